@@ -0,0 +1,163 @@
+"""
+bench_coordinator.py: End-to-end benchmark of DabPumpsApi and DabPumpsCoordinator against a fake cloud.
+
+Measures cold setup (login, installation details, configurations, statusses, translations
+and installation list) and subsequent polls, reporting wall time, CPU time and memory.
+No network is used; latency is injected by the local stand-in for the DAB Pumps servers.
+Alternatively, --replay serves a fixture recorded with API_RECORD, with the original latency.
+
+The synthetic load mode of the integration (SIMULATE_INSTALL_FACTOR, SIMULATE_DEVICE_FACTOR and
+SIMULATE_STATUS_CHURN) can be applied on top via --simulate-installs, --simulate-devices and --churn.
+
+Usage: python -m benchmarks.bench_coordinator --installs 2 --devices 10 --params 400 --latency 0.05 0.2
+       python -m benchmarks.bench_coordinator --devices 10 --simulate-installs 5 --simulate-devices 10 --churn 0.2
+       python -m benchmarks.bench_coordinator --replay dabpumps.record.xxxxxxxx.jsonl.gz
+"""
+
+import argparse
+import asyncio
+import resource
+import statistics
+import tempfile
+import time
+import tracemalloc
+
+import custom_components.dabpumps.coordinator as coordinator_module
+
+from homeassistant.const import CONF_LANGUAGE
+from homeassistant.core import HomeAssistant
+
+from custom_components.dabpumps.api import DabPumpsApi
+from custom_components.dabpumps.const import DOMAIN, CONF_POLLING_INTERVAL
+from custom_components.dabpumps.coordinator import DabPumpsCoordinator
+from custom_components.dabpumps.recorder import DabPumpsApiReplayTransport
+from custom_components.dabpumps.registry import DabPumpsRegistry
+from custom_components.dabpumps.scheduler import DabPumpsAccountScheduler
+from custom_components.dabpumps.simulate import DabPumpsSimulate
+
+from .fake_cloud import FakeDabPumpsCloud
+
+
+class Measurement:
+    """Wall time, CPU time and traced memory of a block of work"""
+
+    def __enter__(self):
+        self.wall = time.perf_counter()
+        self.cpu = time.process_time()
+        return self
+
+    def __exit__(self, *args):
+        self.wall = time.perf_counter() - self.wall
+        self.cpu = time.process_time() - self.cpu
+
+
+async def async_create_hass(config_dir):
+    hass = HomeAssistant(config_dir)
+    hass.config.language = "en"
+    hass.data[DOMAIN] = {}
+
+    # The shared translations and configurations start empty and persist into this config dir
+    DabPumpsRegistry.reset()
+    return hass
+
+
+async def async_setup_coordinators(hass, cloud, polling_interval=20, language="en", batch=False):
+    """Create one api for the account and one coordinator per installation, like async_setup_entry does"""
+    transport = cloud if isinstance(cloud, DabPumpsApiReplayTransport) else cloud.transport()
+    api = DabPumpsApi(hass, "bench@example.com", "bench-password", use_history_store=True, transport=transport)
+    options = { CONF_POLLING_INTERVAL: polling_interval, CONF_LANGUAGE: language }
+    install_ids = [ install_id + DabPumpsSimulate.suffix_id(copy) for copy in range(coordinator_module.SIMULATE_INSTALL_FACTOR) for install_id in cloud.install_ids ]
+    scheduler = DabPumpsAccountScheduler(api) if batch else None
+    return [ DabPumpsCoordinator(hass, api, install_id, options, scheduler) for install_id in install_ids ]
+
+
+async def async_poll(coordinators):
+    await asyncio.gather(*[ coordinator.async_refresh() for coordinator in coordinators ])
+    failed = [ c for c in coordinators if not c.last_update_success ]
+    if failed:
+        raise RuntimeError(f"{len(failed)} coordinators failed to refresh")
+
+
+async def async_run(args):
+    coordinator_module.SIMULATE_INSTALL_FACTOR = args.simulate_installs
+    coordinator_module.SIMULATE_DEVICE_FACTOR = args.simulate_devices
+    coordinator_module.SIMULATE_STATUS_CHURN = args.churn
+
+    if args.replay:
+        cloud = DabPumpsApiReplayTransport(args.replay, speed=args.speed)
+        args.installs = len(cloud.install_ids)
+    else:
+        cloud = FakeDabPumpsCloud(
+            installs = args.installs,
+            devices = args.devices,
+            params = args.params,
+            configs = args.configs,
+            messages = args.messages,
+            latency = tuple(args.latency),
+        )
+
+    with tempfile.TemporaryDirectory() as config_dir:
+        hass = await async_create_hass(config_dir)
+
+        if args.trace_memory:
+            tracemalloc.start()
+
+        with Measurement() as cold:
+            coordinators = await async_setup_coordinators(hass, cloud, batch=args.batch)
+            await async_poll(coordinators)
+            await hass.async_block_till_done()
+
+        cold_requests = cloud.requests
+        cold_memory = tracemalloc.get_traced_memory() if args.trace_memory else None
+
+        polls = []
+        for _ in range(args.polls):
+            with Measurement() as poll:
+                await async_poll(coordinators)
+                await hass.async_block_till_done()
+            polls.append(poll)
+
+        poll_memory = tracemalloc.get_traced_memory() if args.trace_memory else None
+        tracemalloc.stop()
+
+        await hass.async_stop(force=True)
+
+    devices = sum( len(c.data[0]) for c in coordinators )
+    wall = [ 1000.0 * p.wall for p in polls ]
+    cpu = [ 1000.0 * p.cpu for p in polls ]
+
+    if args.replay:
+        print(f"replay={args.replay} installs={args.installs} devices={devices} speed={args.speed}")
+    else:
+        print(f"installs={len(coordinators)} devices={devices} params={args.params} configs={args.configs} latency={args.latency} churn={args.churn}")
+    print(f"cold setup:  wall {1000.0*cold.wall:9.1f} ms  cpu {1000.0*cold.cpu:9.1f} ms  requests {cold_requests}")
+    if polls:
+        print(f"poll (n={len(polls)}): wall median {statistics.median(wall):9.1f} ms  max {max(wall):9.1f} ms")
+        print(f"             cpu  median {statistics.median(cpu):9.1f} ms  max {max(cpu):9.1f} ms  per device {statistics.median(cpu)/devices:6.2f} ms")
+        print(f"             requests per poll {(cloud.requests - cold_requests) / len(polls):.1f}")
+    if cold_memory:
+        print(f"memory:      after setup {cold_memory[0]/2**20:7.1f} MiB  after polls {poll_memory[0]/2**20:7.1f} MiB  peak {poll_memory[1]/2**20:7.1f} MiB")
+    print(f"max rss:     {resource.getrusage(resource.RUSAGE_SELF).ru_maxrss/1024:7.1f} MiB")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--installs", type=int, default=1)
+    parser.add_argument("--devices", type=int, default=2, help="devices per installation")
+    parser.add_argument("--params", type=int, default=400, help="params per configuration")
+    parser.add_argument("--configs", type=int, default=1, help="distinct configurations")
+    parser.add_argument("--messages", type=int, default=3000, help="translated strings")
+    parser.add_argument("--latency", type=float, nargs=2, default=[0.0, 0.0], metavar=("MIN", "MAX"), help="seconds injected per request")
+    parser.add_argument("--replay", metavar="FILE", help="serve a recorded fixture instead of the synthetic cloud")
+    parser.add_argument("--speed", type=float, default=1.0, help="replay speed factor; 0 replays without latency")
+    parser.add_argument("--simulate-installs", type=int, default=1, help="SIMULATE_INSTALL_FACTOR: copies of each installation")
+    parser.add_argument("--simulate-devices", type=int, default=1, help="SIMULATE_DEVICE_FACTOR: copies of each device")
+    parser.add_argument("--churn", type=float, default=0.0, help="SIMULATE_STATUS_CHURN: fraction of measurements of simulated devices changed per poll")
+    parser.add_argument("--batch", action="store_true", help="batch the polls of all installations via the account scheduler")
+    parser.add_argument("--polls", type=int, default=20)
+    parser.add_argument("--trace-memory", action="store_true", help="trace python allocations (slows down the run)")
+    asyncio.run(async_run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
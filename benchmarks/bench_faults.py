@@ -0,0 +1,162 @@
+"""
+bench_faults.py: Scenario suite running DabPumpsCoordinator against a fake cloud with injected latency and faults.
+
+Each scenario first primes the coordinator cache with a fault-free poll, then starts fresh coordinators
+(like after a restart of Home Assistant) whose api injects the faults of the scenario. Per scenario it
+reports the poll completion time, the retries used and the rate of fallbacks to cached data.
+
+Faults must be handled by the retries and fallbacks; the suite fails if any background task raised
+an exception that nobody handled (column 'errors').
+
+The delay between retries is shortened (--retry-delay) to keep the suite fast; completion times scale with it.
+
+Usage: python -m benchmarks.bench_faults [--polls 20] [--retry-delay 0.1] [--scenario flaky]
+"""
+
+import argparse
+import asyncio
+import gc
+import statistics
+import tempfile
+import time
+
+import custom_components.dabpumps.coordinator as coordinator_module
+
+from homeassistant.const import CONF_LANGUAGE
+
+from custom_components.dabpumps.api import DabPumpsApi
+from custom_components.dabpumps.const import CONF_POLLING_INTERVAL
+from custom_components.dabpumps.coordinator import DabPumpsCoordinator
+from custom_components.dabpumps.faults import DabPumpsFault, DabPumpsFaultInjector
+from custom_components.dabpumps.registry import DabPumpsRegistry
+
+from .bench_coordinator import async_create_hass
+from .fake_cloud import FakeDabPumpsCloud
+
+
+LATENCY = ('uniform', 0.02, 0.08)
+
+SCENARIOS = {
+    "baseline": {},
+    "slow": { "*": DabPumpsFault(latency=('lognormal', 0.3, 0.8)) },
+    "flaky": { "*": DabPumpsFault(latency=LATENCY, http_error=0.1) },
+    "res-error": { "*": DabPumpsFault(latency=LATENCY, res_error=0.1) },
+    "forbidden-list": { "installation list": DabPumpsFault(latency=LATENCY, forbidden=1.0) },
+    "expired-tokens": { "*": DabPumpsFault(latency=LATENCY, expired_token=0.05) },
+    "login-expired": { "login": DabPumpsFault(latency=LATENCY, expired_token=0.5) },
+    "timeouts": { "*": DabPumpsFault(latency=LATENCY, timeout=0.05) },
+    "outage": { "*": DabPumpsFault(latency=LATENCY, http_error=1.0) },
+}
+
+
+class TaskErrors:
+    """Counts exceptions of background tasks that were never handled, via the exception handler of the event loop"""
+
+    def __init__(self):
+        self.count = 0
+        self._loop = None
+        self._previous = None
+
+
+    def __enter__(self):
+        self._loop = asyncio.get_running_loop()
+        self._previous = self._loop.get_exception_handler()
+        self._loop.set_exception_handler(self._handle)
+        return self
+
+
+    def __exit__(self, *args):
+        # Unhandled exceptions of finished tasks are only reported once the task is garbage collected
+        gc.collect()
+        self._loop.set_exception_handler(self._previous)
+
+
+    def _handle(self, loop, context):
+        self.count += 1
+        if self._previous:
+            self._previous(loop, context)
+        else:
+            loop.default_exception_handler(context)
+
+
+def create_coordinators(hass, cloud, fault_injector=None):
+    api = DabPumpsApi(hass, "bench@example.com", "bench-password", use_history_store=True, transport=cloud.transport(), fault_injector=fault_injector)
+    options = { CONF_POLLING_INTERVAL: 20, CONF_LANGUAGE: "en" }
+    return [ DabPumpsCoordinator(hass, api, install_id, options) for install_id in cloud.install_ids ]
+
+
+async def async_poll(hass, coordinators):
+    """Poll all coordinators; returns (seconds, number of coordinators that succeeded)"""
+    start = time.perf_counter()
+    await asyncio.gather(*[ coordinator.async_refresh() for coordinator in coordinators ])
+    elapsed = time.perf_counter() - start
+    await hass.async_block_till_done()
+    return (elapsed, sum(1 for c in coordinators if c.last_update_success))
+
+
+async def async_run_scenario(args, name, faults):
+    cloud = FakeDabPumpsCloud(installs=args.installs, devices=args.devices, params=args.params)
+
+    with tempfile.TemporaryDirectory() as config_dir, TaskErrors() as errors:
+        hass = await async_create_hass(config_dir)
+
+        # Prime the persisted coordinator cache without faults
+        await async_poll(hass, create_coordinators(hass, cloud))
+
+        # Start over with fresh coordinators and inject the faults of this scenario.
+        # Like after a restart, the shared translations and configurations are only in the persisted stores
+        DabPumpsRegistry.reset()
+        injector = DabPumpsFaultInjector(faults, seed=args.seed)
+        coordinators = create_coordinators(hass, cloud, fault_injector=injector)
+
+        polls = [ await async_poll(hass, coordinators) for _ in range(1 + args.polls) ]
+
+        await hass.async_stop(force=True)
+
+    wall = [ 1000.0 * seconds for seconds, _ in polls ]
+    succeeded = sum(ok for _, ok in polls)
+    attempts = len(polls) * len(coordinators)
+
+    # _retries_needed[n] counts the calls (polls and config flow) that succeeded or gave up after n retries
+    calls = [ sum(c.retries_needed[idx] for c in coordinators) for idx in range(coordinator_module.COORDINATOR_RETRY_ATTEMPTS) ]
+    retries = sum(idx * n for idx, n in enumerate(calls))
+    fallbacks = sum(c.cache_fallbacks for c in coordinators)
+
+    print(
+        f"{name:<16} {wall[0]:>9.0f} {statistics.median(wall[1:] or wall):>9.0f} {max(wall):>9.0f}"
+        f" {100.0*succeeded/attempts:>6.1f}% {retries:>8} {retries/attempts:>9.2f} {fallbacks/attempts:>10.2f} {errors.count:>6}"
+        f"  {injector.injected}"
+    )
+    return errors.count
+
+
+async def async_run(args):
+    coordinator_module.COORDINATOR_RETRY_DELAY = args.retry_delay
+
+    scenarios = { args.scenario: SCENARIOS[args.scenario] } if args.scenario else SCENARIOS
+
+    print(f"installs={args.installs} devices={args.devices} params={args.params} polls={args.polls} retry_delay={args.retry_delay}")
+    print(f"{'scenario':<16} {'cold ms':>9} {'poll ms':>9} {'max ms':>9} {'success':>7} {'retries':>8} {'retry/poll':>9} {'cache/poll':>10} {'errors':>6}  injected")
+    errors = {}
+    for name, faults in scenarios.items():
+        errors[name] = await async_run_scenario(args, name, faults)
+
+    failed = { name: count for name, count in errors.items() if count }
+    if failed:
+        raise SystemExit(f"Unhandled background task errors: {failed}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--installs", type=int, default=1)
+    parser.add_argument("--devices", type=int, default=2, help="devices per installation")
+    parser.add_argument("--params", type=int, default=400, help="params per configuration")
+    parser.add_argument("--polls", type=int, default=20, help="polls after the cold start")
+    parser.add_argument("--retry-delay", type=float, default=0.1, help="seconds between retries (COORDINATOR_RETRY_DELAY)")
+    parser.add_argument("--scenario", choices=SCENARIOS.keys(), help="run a single scenario")
+    parser.add_argument("--seed", type=int, default=0)
+    asyncio.run(async_run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
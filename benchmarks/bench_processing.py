@@ -0,0 +1,190 @@
+"""
+bench_processing.py: Microbenchmarks for the coordinator processing functions and entity updates.
+
+Drives the _async_process_* functions of DabPumpsCoordinator directly with synthetic payloads,
+and the _update_attributes paths of the entities of every platform. Per function and size it
+reports the time per call, the peak traced memory and the net number of memory blocks retained
+after the call (column 'retained'; this is not a count of the allocations made during the call).
+
+By default processing is kept on the event loop (EXECUTOR_OFFLOAD off) to measure the
+processing itself; pass --offload to measure with the executor offloading as configured.
+
+Usage: python -m benchmarks.bench_processing [--quick] [--offload]
+"""
+
+import argparse
+import asyncio
+import gc
+import inspect
+import tempfile
+import time
+import tracemalloc
+
+import custom_components.dabpumps.coordinator as coordinator_module
+
+from custom_components.dabpumps.api import DabPumpsApi
+from custom_components.dabpumps.binary_sensor import DabPumpsBinarySensor
+from custom_components.dabpumps.coordinator import DabPumpsCoordinator, DabPumpsDevice, DabPumpsStatus
+from custom_components.dabpumps.number import DabPumpsNumber
+from custom_components.dabpumps.select import DabPumpsSelect
+from custom_components.dabpumps.sensor import DabPumpsSensor
+from custom_components.dabpumps.switch import DabPumpsSwitch
+
+from . import payloads
+from .bench_coordinator import async_create_hass
+
+
+INSTALL_ID = payloads.make_install_id(0)
+CONFIG_ID = payloads.make_config_id(0)
+
+
+async def async_measure(func, repeat):
+    """Return (best seconds per call, peak traced bytes, retained blocks) for a sync or async callable"""
+    async def _call():
+        res = func()
+        if inspect.isawaitable(res):
+            await res
+
+    await _call()   # warm up
+
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        await _call()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    tracemalloc.reset_peak()
+    await _call()
+    (_, peak) = tracemalloc.get_traced_memory()
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    # Net number of blocks still allocated after the call, not the number of allocations made during it
+    retained = sum(stat.count_diff for stat in after.compare_to(before, 'filename'))
+
+    return (best, peak, retained)
+
+
+def report(name, size, result):
+    (seconds, peak, retained) = result
+    print(f"{name:<36} {size:>7} {1e6*seconds:>12.1f} {peak/1024:>10.1f} {retained:>8}")
+
+
+def make_devices(count):
+    return [
+        DabPumpsDevice(
+            id = f"pump_{idx}",
+            serial = payloads.make_serial(0, idx),
+            name = f"Pump {idx}",
+            vendor = "DAB Pumps",
+            product = "Esybox",
+            version = "E.sybox",
+            config_id = CONFIG_ID,
+            install_id = INSTALL_ID,
+        )
+        for idx in range(count)
+    ]
+
+
+async def async_bench_coordinator(coordinator, sizes, repeat):
+    for devices in sizes["devices"]:
+        data = payloads.install_payload(0, devices, [CONFIG_ID])
+        report("_async_process_install_data", devices, await async_measure(lambda: coordinator._async_process_install_data(data), repeat))
+
+    for params in sizes["params"]:
+        device = make_devices(1)[0]
+        data = payloads.config_payload(CONFIG_ID, params)
+        report("_async_process_device_config_data", params, await async_measure(lambda: coordinator._async_process_device_config_data(device, data), repeat))
+
+    for devices in sizes["devices"]:
+        device_list = make_devices(devices)
+        data_list = [ payloads.status_payload(device.serial, 400, seed=idx) for idx, device in enumerate(device_list) ]
+
+        async def _async_process_statusses():
+            for device, data in zip(device_list, data_list):
+                await coordinator._async_process_device_status_data(device, data)
+
+        report("_async_process_device_status_data", devices, await async_measure(_async_process_statusses, repeat))
+
+    for messages in sizes["messages"]:
+        data = payloads.strings_payload("en", messages)
+        report("_async_build_string_map", messages, await async_measure(lambda: coordinator._async_build_string_map(data), repeat))
+
+        (_, string_map) = await coordinator._async_build_string_map(data)
+        keys = coordinator._get_string_keys()
+        report("_build_trimmed_string_map", messages, await async_measure(lambda: coordinator._async_run_stage("strings", len(string_map), DabPumpsCoordinator._build_trimmed_string_map, string_map, keys), repeat))
+
+
+async def async_bench_entities(coordinator, sizes, repeat):
+    """Create and update entities of every platform for params of the matching type"""
+    device = make_devices(1)[0]
+    config = DabPumpsCoordinator._build_device_config(device, payloads.config_payload(CONFIG_ID, 400))
+
+    def pick(accept):
+        return next( (p for p in config.meta_params.values() if accept(p)) )
+
+    platforms = [
+        ("sensor", DabPumpsSensor, pick(lambda p: p.type == 'measure' and p.weight != 1)),
+        ("binary_sensor", DabPumpsBinarySensor, pick(lambda p: p.type == 'enum' and 'active' in p.values.values())),
+        ("number", DabPumpsNumber, pick(lambda p: p.type == 'measure')),
+        ("select", DabPumpsSelect, pick(lambda p: p.type == 'enum' and len(p.values) > 2)),
+        ("switch", DabPumpsSwitch, pick(lambda p: p.type == 'enum' and 'Enable' in p.values.values())),
+    ]
+
+    for name, target_class, params in platforms:
+        for count in sizes["entities"]:
+            statusses = [
+                DabPumpsStatus(serial=device.serial, unique_id=f"pump_0_{params.key}_{idx}", key=params.key, val=next(iter(params.values), "1"))
+                for idx in range(count)
+            ]
+            changed = [ status._replace(val=list(params.values)[-1] if params.values else "2") for status in statusses ]
+
+            def _create():
+                return [ target_class(coordinator, INSTALL_ID, status.unique_id, device, params, status) for status in statusses ]
+
+            entities = _create()
+
+            def _update():
+                for entity, status, other in zip(entities, statusses, changed):
+                    entity._update_attributes(other, False)
+                    entity._update_attributes(status, False)
+
+            report(f"{name} create", count, await async_measure(_create, repeat))
+            report(f"{name} _update_attributes (x2)", count, await async_measure(_update, repeat))
+
+
+async def async_run(args):
+    coordinator_module.EXECUTOR_OFFLOAD = args.offload
+
+    sizes = {
+        "devices": [1, 10, 100] if args.quick else [1, 10, 100, 1000],
+        "params": [100, 1000] if args.quick else [100, 1000, 5000],
+        "messages": [1000, 5000] if args.quick else [1000, 5000, 20000],
+        "entities": [1, 100] if args.quick else [1, 100, 1000],
+    }
+    repeat = 3 if args.quick else 10
+
+    with tempfile.TemporaryDirectory() as config_dir:
+        hass = await async_create_hass(config_dir)
+        api = DabPumpsApi(hass, "bench@example.com", "bench-password", use_history_store=False)
+        coordinator = DabPumpsCoordinator(hass, api, INSTALL_ID, {})
+
+        print(f"{'function':<36} {'size':>7} {'us/call':>12} {'peak kB':>10} {'retained':>8}")
+        await async_bench_coordinator(coordinator, sizes, repeat)
+        await async_bench_entities(coordinator, sizes, repeat)
+
+        await hass.async_stop(force=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--quick", action="store_true", help="smaller sizes and fewer repeats")
+    parser.add_argument("--offload", action="store_true", help="keep executor offloading of large payloads enabled")
+    asyncio.run(async_run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+"""
+bench_replay.py: Record/replay round-trip of DabPumpsCoordinator against the fake cloud.
+
+Records the requests of a number of polls against the synthetic cloud into a fixture file (like API_RECORD),
+then polls fresh coordinators against that fixture via DabPumpsApiReplayTransport. Reports the time per poll
+of both runs. The round-trip fails if a poll of the replay fails, or if any background task raised an exception
+that nobody handled, i.e. while building the history kept for diagnostics.
+
+Usage: python -m benchmarks.bench_replay [--polls 5] [--speed 0]
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import tempfile
+import time
+
+from homeassistant.const import CONF_LANGUAGE
+
+from custom_components.dabpumps.api import DabPumpsApi
+from custom_components.dabpumps.const import CONF_POLLING_INTERVAL
+from custom_components.dabpumps.coordinator import DabPumpsCoordinator
+from custom_components.dabpumps.recorder import DabPumpsApiReplayTransport
+from custom_components.dabpumps.registry import DabPumpsRegistry
+
+from .bench_coordinator import async_create_hass
+from .bench_faults import TaskErrors
+from .fake_cloud import FakeDabPumpsCloud
+
+
+async def async_run_session(args, transport, install_ids, record_path=None):
+    """Poll all installations; returns (ms per poll, number of failed polls, number of task errors)"""
+    with tempfile.TemporaryDirectory() as config_dir, TaskErrors() as errors:
+        hass = await async_create_hass(config_dir)
+
+        api = DabPumpsApi(hass, "bench@example.com", "bench-password", use_history_store=True, transport=transport, record_path=record_path)
+        options = { CONF_POLLING_INTERVAL: 20, CONF_LANGUAGE: "en" }
+        coordinators = [ DabPumpsCoordinator(hass, api, install_id, options) for install_id in install_ids ]
+
+        wall = []
+        failed = 0
+        for _ in range(args.polls):
+            start = time.perf_counter()
+            await asyncio.gather(*[ coordinator.async_refresh() for coordinator in coordinators ])
+            wall.append(1000.0 * (time.perf_counter() - start))
+            failed += sum(1 for c in coordinators if not c.last_update_success)
+
+        await hass.async_block_till_done()
+        await hass.async_stop(force=True)
+
+    DabPumpsRegistry.reset()
+    return (wall, failed, errors.count)
+
+
+def report(name, result):
+    (wall, failed, errors) = result
+    print(f"{name:<8} {statistics.median(wall):>9.1f} {max(wall):>9.1f} {failed:>7} {errors:>6}")
+
+
+async def async_run(args):
+    cloud = FakeDabPumpsCloud(installs=args.installs, devices=args.devices, params=args.params)
+
+    with tempfile.TemporaryDirectory() as fixture_dir:
+        path = os.path.join(fixture_dir, "dabpumps.record.jsonl.gz")
+
+        print(f"installs={args.installs} devices={args.devices} params={args.params} polls={args.polls} speed={args.speed}")
+        print(f"{'run':<8} {'poll ms':>9} {'max ms':>9} {'failed':>7} {'errors':>6}")
+
+        recorded = await async_run_session(args, cloud.transport(), cloud.install_ids, record_path=path)
+        report("record", recorded)
+
+        replay = DabPumpsApiReplayTransport(path, speed=args.speed)
+        replayed = await async_run_session(args, replay, replay.install_ids)
+        report("replay", replayed)
+
+    (_, failed, errors) = replayed
+    if failed or errors or recorded[2]:
+        raise SystemExit(f"Replay round-trip failed: {failed} failed polls, {errors + recorded[2]} unhandled background task errors")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--installs", type=int, default=1)
+    parser.add_argument("--devices", type=int, default=2, help="devices per installation")
+    parser.add_argument("--params", type=int, default=400, help="params per configuration")
+    parser.add_argument("--polls", type=int, default=5)
+    parser.add_argument("--speed", type=float, default=0.0, help="replay speed factor; 0 replays without latency")
+    asyncio.run(async_run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+"""
+bench_store_codec.py: Compare plain json and compressed store entries.
+
+Reports the on-disk size and write latency of a coordinator cache and an
+api history detail, in the legacy (plain json) and the compressed format.
+
+Usage: python -m benchmarks.bench_store_codec
+"""
+
+import os
+import tempfile
+import time
+
+from homeassistant.helpers.json import json_bytes
+
+from custom_components.dabpumps.api import DabPumpsStoreCodec
+
+from . import payloads
+
+
+ROUNDS = 20
+
+
+def _cache_entries(params, messages):
+    """Entries as written by DabPumpsCoordinator._async_update_cache"""
+    return {
+        "configuration 0000": payloads.config_payload("0000", params),
+        "statusses SN0000000000": payloads.status_payload("SN0000000000", params),
+        "localization_en": payloads.strings_payload("en", messages, params),
+    }
+
+
+def _history_entries(params):
+    """Entries as written by DabPumpsApi._async_update_diagnostics"""
+    return {
+        "configuration 0000": {
+            "ts": "2024-01-01T00:00:00",
+            "req": { "method": "GET", "url": "https://dconnect.dabpumps.com/api/v1/configuration/0000", "headers": {} },
+            "res": { "status": "200 OK", "headers": {}, "elapsed": 0.5, "json": payloads.config_payload("0000", params) },
+        },
+    }
+
+
+def _measure(entries, compress):
+    """Return (size in bytes, mean encode+serialize+write latency in ms)"""
+    encode = DabPumpsStoreCodec.encode if compress else (lambda d: d)
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        path = os.path.join(tmpdir, "store.json")
+        elapsed = 0.0
+        for _ in range(ROUNDS):
+            start = time.perf_counter()
+            doc = { "key": { k: encode(v) for k,v in entries.items() } }
+            raw = json_bytes(doc)
+            with open(path, "wb") as f:
+                f.write(raw)
+                f.flush()
+                os.fsync(f.fileno())
+            elapsed += time.perf_counter() - start
+
+        return (os.path.getsize(path), 1000.0 * elapsed / ROUNDS)
+
+
+def main():
+    print(f"{'store':<12} {'params':>6} {'plain kB':>9} {'gzip kB':>8} {'ratio':>6} {'plain ms':>9} {'gzip ms':>8}")
+    for params in [100, 400, 1000]:
+        for name, entries in [
+            ("coordinator", _cache_entries(params, 3000)),
+            ("api_history", _history_entries(params)),
+        ]:
+            (size_plain, ms_plain) = _measure(entries, compress=False)
+            (size_gzip, ms_gzip) = _measure(entries, compress=True)
+            print(f"{name:<12} {params:>6} {size_plain/1024:>9.1f} {size_gzip/1024:>8.1f} {size_plain/size_gzip:>6.1f} {ms_plain:>9.2f} {ms_gzip:>8.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,151 @@
+"""
+fake_cloud.py: Local stand-in for the DAB Pumps cloud endpoints used by DabPumpsApi.
+
+Serves synthetic installations, configurations, statusses and translations via a
+httpx transport, so DabPumpsApi and DabPumpsCoordinator can run without network.
+"""
+
+import asyncio
+import json
+import random
+import re
+import time
+
+import httpx
+import jwt
+
+from . import payloads
+
+
+TOKEN_COOKIE = "dabcsauthtoken"
+TOKEN_KEY = "fake-dabpumps-cloud-token-signing-key"
+TOKEN_LIFETIME = 3600 # seconds
+STATUS_VARIANTS = 4   # pre-generated status payloads per device, rotated on each request
+
+
+class FakeDabPumpsCloud:
+    """
+    Stand-in for dconnect.dabpumps.com, parameterized by size and injected latency.
+
+    installs:   number of installations for the account
+    devices:    number of dums per installation
+    params:     number of metadata params per configuration (and statusses per device)
+    configs:    number of distinct configurations shared by the devices
+    messages:   number of translated strings per language
+    latency:    (min, max) seconds of latency injected per request
+    """
+
+    def __init__(self, installs=1, devices=2, params=400, configs=1, messages=3000, latency=(0.0, 0.0), seed=0):
+        self._rnd = random.Random(seed)
+        self._latency = latency
+        self._params = params
+        self._messages = messages
+
+        config_ids = [ payloads.make_config_id(idx) for idx in range(configs) ]
+        self._installs = { payloads.make_install_id(idx): payloads.install_payload(idx, devices, config_ids) for idx in range(installs) }
+        self._configs = { config_id: payloads.config_payload(config_id, params, seed=idx) for idx, config_id in enumerate(config_ids) }
+        self._serials = [ dum["serial"] for install in self._installs.values() for dum in install["dums"] ]
+        self._statusses = {}
+        self._requests = 0
+
+        # Pre-encode the responses, so serving them costs as little CPU as possible in the measurements
+        self._bodies = {
+            "installation list": _encode({ "res": "OK", "values": list(self._installs.values()) }),
+        } | {
+            f"installation {k}": _encode(v) for k,v in self._installs.items()
+        } | {
+            f"configuration {k}": _encode(v) for k,v in self._configs.items()
+        }
+
+
+    @property
+    def install_ids(self):
+        return list(self._installs.keys())
+
+
+    @property
+    def serials(self):
+        return self._serials
+
+
+    @property
+    def requests(self):
+        return self._requests
+
+
+    def transport(self):
+        return httpx.MockTransport(self.async_handle)
+
+
+    async def async_handle(self, request: httpx.Request) -> httpx.Response:
+        self._requests += 1
+
+        (lo, hi) = self._latency
+        if hi > 0:
+            await asyncio.sleep(self._rnd.uniform(lo, hi))
+
+        path = request.url.path
+
+        if path == "/auth/token" and request.method == "POST":
+            token = jwt.encode({ "exp": int(time.time()) + TOKEN_LIFETIME }, TOKEN_KEY, algorithm="HS256")
+            return _json(_encode({ "access_token": token, "token_type": "bearer" }))
+
+        if not self._is_authorized(request):
+            return _json(_encode({ "res": "ERROR", "code": "FORBIDDEN", "msg": "Forbidden operation", "where": "ROUTE RULE" }))
+
+        if path == "/api/v1/installation":
+            return _json(self._bodies["installation list"])
+
+        if m := re.fullmatch(r"/api/v1/installation/([^/]+)", path):
+            return self._get_body(f"installation {m.group(1)}")
+
+        if m := re.fullmatch(r"/api/v1/configuration/([^/]+)", path):
+            return self._get_body(f"configuration {m.group(1)}")
+
+        if m := re.fullmatch(r"/dumstate/([^/]+)", path):
+            return self._get_status(m.group(1))
+
+        if request.method == "POST" and re.fullmatch(r"/dum/([^/]+)", path):
+            return _json(_encode({ "res": "OK" }))
+
+        if m := re.fullmatch(r"/resources/js/localization_([a-z]+)\.properties", path):
+            return _json(_encode(payloads.strings_payload(m.group(1), self._messages, self._params)))
+
+        return httpx.Response(404, text="Not Found")
+
+
+    def _is_authorized(self, request):
+        """Only accept requests carrying a token cookie with a token we signed that has not expired yet"""
+        cookies = [ c.strip().split("=", 1) for c in request.headers.get("cookie", "").split(";") if "=" in c ]
+        token = dict(cookies).get(TOKEN_COOKIE)
+        try:
+            return token and jwt.decode(token, TOKEN_KEY, algorithms=["HS256"])
+        except jwt.InvalidTokenError:
+            return False
+
+
+    def _get_body(self, key):
+        body = self._bodies.get(key)
+        if body is None:
+            return httpx.Response(404, text="Not Found")
+        return _json(body)
+
+
+    def _get_status(self, serial):
+        if serial not in self._serials:
+            return httpx.Response(404, text="Not Found")
+
+        variants = self._statusses.get(serial)
+        if not variants:
+            variants = [ _encode(payloads.status_payload(serial, self._params, seed=f"{serial}{v}")) for v in range(STATUS_VARIANTS) ]
+            self._statusses[serial] = variants
+
+        return _json(variants[self._requests % STATUS_VARIANTS])
+
+
+def _encode(data):
+    return json.dumps(data).encode("utf-8")
+
+
+def _json(body):
+    return httpx.Response(200, content=body, headers={ "content-type": "application/json;charset=UTF-8" })
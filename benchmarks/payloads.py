@@ -0,0 +1,114 @@
+"""payloads.py: Synthetic DAB Pumps cloud payloads for benchmarks."""
+
+import json
+import random
+
+
+PARAM_GROUPS = ['Status', 'Setpoint', 'Extra Comfort', 'Debug', 'I/O', 'Version', 'Errors', 'System Management']
+PARAM_UNITS = ['bar', 'l/min', '°C', 'kW', 'kWh', 'h', 's', '%', 'rpm', 'V', 'A', '']
+
+
+def make_install_id(idx):
+    return f"{idx:08d}-0000-4000-8000-000000000000"
+
+def make_serial(install_idx, dum_idx):
+    return f"SN{install_idx:04d}{dum_idx:06d}"
+
+def make_config_id(config_idx):
+    return f"{config_idx:04d}"
+
+def make_param_name(param_idx):
+    return f"Param_{param_idx:04d}"
+
+
+def config_payload(config_id, params=400, seed=0):
+    """Response of GET /api/v1/configuration/{config_id}"""
+    rnd = random.Random(seed)
+    meta_params = []
+    for idx in range(params):
+        kind = rnd.choice(['measure', 'measure', 'enum', 'label'])
+        param = {
+            "name": make_param_name(idx),
+            "type": kind,
+            "family": rnd.choice(['gear', 'info', 'water']),
+            "group": rnd.choice(PARAM_GROUPS),
+            "view": ["CUSTOMER", "INSTALLER", "SERVICE", "R&D"],
+            "change": rnd.choice([[], ["INSTALLER", "SERVICE"], ["CUSTOMER", "INSTALLER"]]),
+            "log": ["SERVICE"],
+            "report": [],
+        }
+        if kind == 'measure':
+            param |= {
+                "unit": rnd.choice(PARAM_UNITS),
+                "weight": rnd.choice([1, 0.1, 0.01]),
+                "min": 0,
+                "max": rnd.choice([10, 100, 1000]),
+            }
+        elif kind == 'enum':
+            values = rnd.choice([ [["0", "Disable"], ["1", "Enable"]], [["0", "disactive"], ["1", "active"]], [[str(v), f"Mode_{v}"] for v in range(5)] ])
+            param |= { "values": values }
+        meta_params.append(param)
+
+    return {
+        "res": "OK",
+        "configuration_id": config_id,
+        "name": f"config_{config_id}",
+        "label": f"Config {config_id}",
+        "description": f"Synthetic configuration {config_id}",
+        "metadata": { "params": meta_params },
+    }
+
+
+def status_payload(serial, params=400, seed=0):
+    """Response of GET /dumstate/{serial}"""
+    rnd = random.Random(seed)
+    values = { make_param_name(idx): str(rnd.randint(0, 1000)) for idx in range(params) }
+    return {
+        "res": "OK",
+        "serial": serial,
+        "status": json.dumps(values),
+    }
+
+
+def install_payload(install_idx, devices=2, config_ids=None):
+    """Response of GET /api/v1/installation/{install_id}"""
+    config_ids = config_ids or [make_config_id(0)]
+    dums = [
+        {
+            "serial": make_serial(install_idx, idx),
+            "name": f"Pump {install_idx}.{idx}",
+            "ProductName": "Esybox",
+            "configuration_name": "E.sybox",
+            "configuration_id": config_ids[idx % len(config_ids)],
+        }
+        for idx in range(devices)
+    ]
+    return {
+        "res": "OK",
+        "installation_id": make_install_id(install_idx),
+        "name": f"Installation {install_idx}",
+        "description": f"Synthetic installation {install_idx}",
+        "company": "",
+        "address": "",
+        "user_role": "INSTALLER",
+        "dums": dums,
+    }
+
+
+def install_list_payload(installs=1, devices=2, config_ids=None):
+    """Response of GET /api/v1/installation"""
+    return {
+        "res": "OK",
+        "values": [ install_payload(idx, devices, config_ids) for idx in range(installs) ],
+    }
+
+
+def strings_payload(lang='en', messages=3000, params=400):
+    """Response of GET /resources/js/localization_{lang}.properties?format=JSON"""
+    strings = { make_param_name(idx): f"Parameter {idx} ({lang})" for idx in range(params) }
+    strings |= { f"Mode_{v}": f"Mode {v} ({lang})" for v in range(5) }
+    strings |= { f"msg_{idx:05d}": f"Unused message number {idx} ({lang})" for idx in range(max(0, messages - len(strings))) }
+    return {
+        "bundle": lang,
+        "messages": strings,
+    }
@@ -22,6 +22,9 @@ from .coordinator import (
     DabPumpsCoordinatorFactory,
     DabPumpsCoordinator
 )
+from .entity_base import (
+    DabPumpsEntityHelperFactory,
+)
 
 from .const import (
     STARTUP_MESSAGE,
@@ -29,6 +32,7 @@ from .const import (
     PLATFORMS,
     API,
     COORDINATOR,
+    SCHEDULER,
     HELPER,
     CONF_INSTALL_ID,
     CONF_INSTALL_NAME,
@@ -44,7 +48,10 @@ CONFIG_SCHEMA = cv.config_entry_only_config_schema(DOMAIN)
 
 async def async_setup(hass: HomeAssistant, config: ConfigType) -> bool:
     """Set up the component."""
+    # Keep the api a config flow may already have created, so the new entry can continue its session
+    api_map = hass.data.get(DOMAIN, {}).get(API, {})
     _clear_hass_data(hass)
+    hass.data[DOMAIN][API].update(api_map)
 
     for entry in hass.config_entries.async_entries(DOMAIN):
         if not isinstance(entry.unique_id, str):
@@ -58,6 +65,7 @@ def _clear_hass_data(hass):
     hass.data[DOMAIN] = {
         API: {},         # key is username+hash(password)
         COORDINATOR: {}, # key is install_id
+        SCHEDULER: {},   # key is username+hash(password)
         HELPER: {}       # key is install_id
     }
 
@@ -87,9 +95,8 @@ async def async_setup_entry(hass: HomeAssistant, config_entry: ConfigEntry) -> b
     # Forward to all platforms (sensor, switch, ...)
     await hass.config_entries.async_forward_entry_setups(config_entry, PLATFORMS)
 
-    # Reload entry when it is updated
-    # config_entry.async_on_unload(config_entry.add_update_listener(_async_update_listener))
-    config_entry.add_update_listener(_async_update_listener)
+    # Reload entry when it is updated; the listener is removed again when the entry is unloaded
+    config_entry.async_on_unload(config_entry.add_update_listener(_async_update_listener))
     
     return True
 
@@ -97,8 +104,10 @@ async def async_setup_entry(hass: HomeAssistant, config_entry: ConfigEntry) -> b
 async def async_unload_entry(hass: HomeAssistant, config_entry: ConfigEntry):
     success = await hass.config_entries.async_unload_platforms(config_entry, PLATFORMS)
     if success:
-        # Force re-create of Coordinator and Api on a subsequent async_setup_entry
-        _clear_hass_data(hass)
+        # Force re-create of the Coordinator for this installation on a subsequent async_setup_entry.
+        # Other installations keep running; the shared Api goes only with the last installation of the account
+        DabPumpsEntityHelperFactory.remove(hass, config_entry)
+        await DabPumpsCoordinatorFactory.async_remove(hass, config_entry)
 
     return success
 
@@ -107,4 +116,11 @@ async def _async_update_listener(hass: HomeAssistant, config_entry: ConfigEntry)
     """Fired after update of Config Options."""
 
     _LOGGER.debug(f"Detect update of config options {config_entry.options}")
+
+    # Apply the interval and language to the running coordinator; only other changes need a reload
+    install_id = config_entry.data[CONF_INSTALL_ID]
+    coordinator = hass.data[DOMAIN].get(COORDINATOR, {}).get(install_id, None)
+    if coordinator and await coordinator.async_apply_options(config_entry.options):
+        return
+
     await hass.config_entries.async_reload(config_entry.entry_id)
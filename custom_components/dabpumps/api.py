@@ -1,6 +1,8 @@
 """api.py: DabPumps API for DAB Pumps integration."""
 
 import asyncio
+import base64
+import gzip
 import hashlib
 import httpx
 import json
@@ -20,8 +22,8 @@ from homeassistant.components.diagnostics.util import async_redact_data
 from homeassistant.components.sensor import SensorStateClass
 from homeassistant.core import HomeAssistant
 from homeassistant.exceptions import IntegrationError
-from homeassistant.helpers.httpx_client import create_async_httpx_client
-from homeassistant.helpers.storage import Store
+from homeassistant.helpers.json import json_bytes
+from homeassistant.util.json import json_loads
 
 from httpx import RequestError, TimeoutException
 
@@ -33,10 +35,36 @@ from .const import (
     DABPUMPS_API_DOMAIN,
     DABPUMPS_API_TOKEN_COOKIE,
     DABPUMPS_API_TOKEN_TIME_MIN,
+    API_LOGIN_PERSIST_TOKEN,
+    API_INSTALL_LIST_REUSE,
     API_LOGIN,
     API_CLIENT_TIMEOUT,
-    SIMULATE_SUFFIX_ID,
+    API_RATE_LIMIT,
+    API_RATE_BURST,
+    API_PRIORITY,
+    API_PRIORITY_DEFAULT,
+    API_RECORD,
     DIAGNOSTICS_REDACT,
+    STORE_COMPRESS,
+    STORE_COMPRESS_MIN_SIZE,
+    EXECUTOR_OFFLOAD,
+    EXECUTOR_MIN_BYTES,
+)
+from .limiter import (
+    DabPumpsRequestLimiter,
+)
+from .metrics import (
+    DabPumpsLoopTimer,
+    DabPumpsRequestStats,
+)
+from .host import (
+    DabPumpsHost,
+)
+from .simulate import (
+    DabPumpsSimulate,
+)
+from .recorder import (
+    DabPumpsApiRecorder,
 )
 
 
@@ -46,13 +74,17 @@ _LOGGER = logging.getLogger(__name__)
 class DabPumpsApiFactory:
     
     @staticmethod
-    def create(hass: HomeAssistant, username, password):
+    def create(hass: HomeAssistant, username, password, register=True):
         """
-        Get a stored instance of the DabPumpsApi for given credentials
+        Get a stored instance of the DabPumpsApi for given credentials.
+        With register=False a new instance is not stored yet; the config flow only does so via register()
+        once the credentials are known to be valid and a config entry is created
         """
     
-        key = f"{username.lower()}_{hash(password) % 10**8}"
+        key = DabPumpsApiFactory.create_key(username, password)
     
+        # The config flow can run before the component is set up
+        hass.data.setdefault(DOMAIN, {})
         if not API in hass.data[DOMAIN]:
             hass.data[DOMAIN][API] = {}
             
@@ -61,11 +93,35 @@ class DabPumpsApiFactory:
         if not api:
             # Create a new DabPumpsApi instance
             api = DabPumpsApi(hass, username, password, use_history_store=True)
-            hass.data[DOMAIN][API][key] = api
+            if register:
+                hass.data[DOMAIN][API][key] = api
         
         return api
+
+
+    @staticmethod
+    def register(hass: HomeAssistant, username, password, api):
+        """
+        Store an instance that was created with register=False, so the config entries for given credentials use it
+        """
+        key = DabPumpsApiFactory.create_key(username, password)
+        hass.data.setdefault(DOMAIN, {}).setdefault(API, {}).setdefault(key, api)
+
+
+    @staticmethod
+    def is_registered(hass: HomeAssistant, username, password, api):
+        key = DabPumpsApiFactory.create_key(username, password)
+        return hass.data.get(DOMAIN, {}).get(API, {}).get(key, None) is api
     
 
+    @staticmethod
+    def create_key(username, password):
+        """
+        Key of the DabPumpsApi instance for given credentials
+        """
+        return f"{username.lower()}_{hash(password) % 10**8}"
+
+
     @staticmethod
     def create_temp(hass: HomeAssistant, username, password):
         """
@@ -81,27 +137,111 @@ class DabPumpsApiFactory:
 # DabPumpsAPI to detect device and get device info, fetch the actual data from the Resol device, and parse it
 class DabPumpsApi:
     
-    def __init__(self, hass, username, password, use_history_store=True):
-        self._hass = hass
+    def __init__(self, hass, username, password, use_history_store=True, transport=None, record_path=None, fault_injector=None):
+        # hass is either a HomeAssistant instance or, when running standalone, a DabPumpsHost
+        self._host = DabPumpsHost.of(hass)
         self._username = username
         self._password = password
+        self._transport = transport
         self._client = None
         self._login_method = None
+        self._login_stats = {}
+        self._login_restored = False
+        self._login_lock = asyncio.Lock()
+
+        # last fetched installation list, shared by the config flow and the installations of this account
+        self._install_list_ts = datetime.min
+        self._install_list = None
+
+        # optionally record all requests and responses into a fixture file for later replay
+        if record_path is None and API_RECORD and use_history_store:
+            record_path = self._host.path(f"{DOMAIN}.record.{hashlib.sha1(username.lower().encode('utf-8')).hexdigest()[:8]}.jsonl.gz")
+
+        self._recorder = DabPumpsApiRecorder(self._host, record_path) if record_path else None
+
+        # optionally inject latency and faults into requests (see faults.py)
+        self._fault_injector = fault_injector
+
+        # time the event loop was blocked while decoding responses
+        self._loop_timer = DabPumpsLoopTimer(forward=True)
+
+        # latency, errors and bytes transferred per kind of request
+        self._request_stats = DabPumpsRequestStats()
+
+        # rate limit for all requests of this account, letting writes by the user go first
+        self._limiter = DabPumpsRequestLimiter(API_RATE_LIMIT, API_RATE_BURST)
         
         if use_history_store:
             # maintain calls history for diagnostics during normal operations    
             self._history_key = username.lower()
-            self._history_store = DabPumpsApiHistoryStore(hass, self._history_key)
+            self._history_store = DabPumpsApiHistoryStore(self._host, self._history_key)
 
             # Cleanup the history store after each restart.
-            asyncio.run_coroutine_threadsafe(self._async_cleanup_diagnostics(), hass.loop)
+            asyncio.run_coroutine_threadsafe(self._async_cleanup_diagnostics(), self._host.loop)
         else:
             # Use from a temporary coordinator during config-flow first time setup of component
             self._history_key = None
             self._history_store = None
 
 
+    @property
+    def loop_timer(self):
+        return self._loop_timer
+
+
+    @property
+    def request_stats(self):
+        return self._request_stats
+
+
+    @property
+    def limiter(self):
+        return self._limiter
+
+
     async def async_login(self):
+        # Installations that share this api poll at the same time; let them share one login
+        async with self._login_lock:
+            if not self._login_restored:
+                await self._async_restore_login()
+
+            await self._async_login()
+
+
+    async def _async_restore_login(self):
+        """
+        Restore the login method that succeeded before a restart, and its token if still valid,
+        so the first poll needs at most one login request, or none at all
+        """
+        self._login_restored = True
+        if not self._history_store:
+            return
+
+        data = await self._history_store.async_get_data() or {}
+        login = data.get("login", {})
+
+        self._login_stats = login.get("methods", {})
+        self._login_method = self._login_method or login.get("method")
+
+        # The token is only reused for the credentials it was obtained with; a wrong password must still fail to login
+        token = login.get("token")
+        if login.get("credentials") != self._get_credentials_hash():
+            token = None
+
+        if token and API_LOGIN_PERSIST_TOKEN and not self._client:
+            try:
+                token_payload = jwt.decode(jwt=token, options={"verify_signature": False})
+            except Exception:
+                return
+
+            if token_payload.get("exp", 0) - time.time() > DABPUMPS_API_TOKEN_TIME_MIN:
+                _LOGGER.debug(f"DAB Pumps restored login session for '{self._username}'")
+                client = self._create_client()
+                client.cookies.set(name=DABPUMPS_API_TOKEN_COOKIE, value=token, domain=DABPUMPS_API_DOMAIN, path='/')
+                self._client = client
+
+
+    async def _async_login(self):
         # Step 0: do we still have a client with a non-expired auth token?
         if self._client:
             token = self._client.cookies.get(DABPUMPS_API_TOKEN_COOKIE, domain=DABPUMPS_API_DOMAIN)
@@ -110,7 +250,7 @@ class DabPumpsApi:
                 
                 if token_payload.get("exp", 0) - time.time() > DABPUMPS_API_TOKEN_TIME_MIN:
                     # still valid for another 10 seconds
-                    await self._async_update_diagnostics(datetime.now(), "token reuse", None, None, token_payload)
+                    await self._async_update_diagnostics(datetime.now(), "token reuse", None, token_payload)
                     return
 
         # Make sure to have been logged out of previous sessions.
@@ -118,9 +258,10 @@ class DabPumpsApi:
         await self.async_logout()
         
         # We have four possible login methods that all seem to work for both DConnect (non-expired) and for DAB Live
-        # First try the method that succeeded last time!
+        # First try the method that succeeded last time, then the others in order of their success so far
         error = None
-        methods = [self._login_method, API_LOGIN.DABLIVE_APP_1, API_LOGIN.DABLIVE_APP_0, API_LOGIN.DCONNECT_APP, API_LOGIN.DCONNECT_WEB]
+        methods = [API_LOGIN.DABLIVE_APP_1, API_LOGIN.DABLIVE_APP_0, API_LOGIN.DCONNECT_APP, API_LOGIN.DCONNECT_WEB]
+        methods = [self._login_method] + sorted(methods, key=self._get_login_success_rate, reverse=True)
         for method in methods:
             try:
                 match method:
@@ -144,20 +285,69 @@ class DabPumpsApi:
                 # start using this client and remember which method had success
                 self._client = client
                 self._login_method = method  
+                self._update_login_stats(method, True)
                 return  
             
             except Exception as ex:
                 error = ex
+                self._update_login_stats(method, False)
 
         # if we reached this point then all methods failed.
         if error:
             raise error
+
+
+    def _get_credentials_hash(self):
+        """Salted hash of the credentials, to tie a persisted token to them without persisting the password"""
+        return hashlib.sha256(f"{DOMAIN}:{self._username.lower()}:{self._password}".encode('utf-8')).hexdigest()
+
+
+    def _get_login_success_rate(self, method):
+        stats = self._login_stats.get(method, {})
+        success = stats.get("success", 0)
+        failure = stats.get("failure", 0)
+        # A method that was never tried ranks between methods that mostly succeed and mostly fail
+        return (success + 1) / (success + failure + 2)
+
+
+    def _update_login_stats(self, method, success):
+        stats = self._login_stats.setdefault(method, { "success": 0, "failure": 0 })
+        stats["success" if success else "failure"] += 1
+
+        # worker function
+        async def _async_worker(self, login):
+            # Persist the login method and session so they survive a restart
+            if not self._history_store:
+                return None
+
+            def _update(data):
+                data["login"] = login
+                return data
+
+            await self._history_store.async_update(_update)
+
+        if not success:
+            # Persisted together with the stats of the method that finally succeeds
+            return
+
+        token = self._client.cookies.get(DABPUMPS_API_TOKEN_COOKIE, domain=DABPUMPS_API_DOMAIN) if self._client else None
+        login = {
+            "method": self._login_method,
+            "methods": self._login_stats,
+            "token": token if API_LOGIN_PERSIST_TOKEN else None,
+            "credentials": self._get_credentials_hash() if API_LOGIN_PERSIST_TOKEN else None,
+        }
+
+        # Create the worker task to update the store in the background,
+        # but do not let main loop wait for it to finish
+        if self._host:
+            self._host.async_create_task(_async_worker(self, login))
         
 
     async def async_login_dablive_app(self, isDabLive=1):
         # Step 1: get authorization token
         # Use a fresh client to keep track of cookies during login and subsequent calls
-        client = create_async_httpx_client(self._hass, follow_redirects=True, timeout=API_CLIENT_TIMEOUT)
+        client = self._create_client()
 
         context = f"login DabLive_app (isDabLive={isDabLive})"
         verb = "POST"
@@ -191,7 +381,7 @@ class DabPumpsApi:
     async def async_login_dconnect_app(self):
         # Step 1: get authorization token
         # Use a fresh client to keep track of cookies during login and subsequent calls
-        client = create_async_httpx_client(self._hass, follow_redirects=True, timeout=API_CLIENT_TIMEOUT)
+        client = self._create_client()
 
         context = f"login DConnect_app"
         verb = "POST"
@@ -238,7 +428,7 @@ class DabPumpsApi:
     async def async_login_dconnect_web(self):
         # Step 1: get login url
         # Use a fresh client to keep track of cookies during login and subsequent calls
-        client = create_async_httpx_client(self._hass, follow_redirects=True, timeout=API_CLIENT_TIMEOUT)
+        client = self._create_client()
 
         context = f"login DConnect_web home"
         verb = "GET"
@@ -268,6 +458,17 @@ class DabPumpsApi:
         return client
         
         
+    def _create_client(self):
+        """
+        Create a fresh client to keep track of cookies during login and subsequent calls.
+        An explicit transport (i.e. a local stand-in for the DAB Pumps servers) bypasses the client of the host
+        """
+        if self._transport:
+            return httpx.AsyncClient(transport=self._transport, follow_redirects=True, timeout=API_CLIENT_TIMEOUT)
+        
+        return self._host.create_client(follow_redirects=True, timeout=API_CLIENT_TIMEOUT)
+
+
     async def async_logout(self):
         # do not call aclose() on the Home Assistant async httpx client. Home Assistant will take care of it during shutdown
         self._client = None
@@ -282,21 +483,31 @@ class DabPumpsApi:
         url = DABPUMPS_API_URL + '/api/v1/installation'
 
         _LOGGER.debug(f"DAB Pumps retrieve installation list for '{self._username}' via {verb} {url}")
-        (result, request, response) = await self._async_send_request_ex(context, verb, url, diagnostics=False)   
+        (result, envelope) = await self._async_send_request_ex(context, verb, url, diagnostics=False)   
 
         # only update diagnostics if we actually received data
         # this data is then used as fallback for async_fetch_install_details
         values = result.get('values', [])
         if values and len(values) > 0:
-            await self._async_update_diagnostics(timestamp, context, request, response)
+            await self._async_update_diagnostics(timestamp, context, envelope)
+
+            self._install_list_ts = timestamp
+            self._install_list = result
 
         return result
 
 
+    def get_recent_install_list(self):
+        """The installation list if it was fetched only moments ago, i.e. during the config flow; otherwise None"""
+        if (datetime.now() - self._install_list_ts).total_seconds() < API_INSTALL_LIST_REUSE:
+            return self._install_list
+        return None
+
+
     async def async_fetch_install_details(self, install_id):
         """Get installation details"""
 
-        install_id_org = install_id.removesuffix(SIMULATE_SUFFIX_ID)
+        install_id_org = DabPumpsSimulate.original_id(install_id)
 
         context = f"installation {install_id}"
         verb = "GET"
@@ -316,12 +527,12 @@ class DabPumpsApi:
         if not self._history_store:
             return {}
         
-        install_id_org = install_id.removesuffix(SIMULATE_SUFFIX_ID)
+        install_id_org = DabPumpsSimulate.original_id(install_id)
         context = f"installation list"
         
         data = await self._history_store.async_get_data() or {}
-        installation_list = data.get("details", {}).get(context, {})
-        installations = installation_list.get("response", {}).get("json", {}).get("values", [])
+        installation_list = DabPumpsStoreCodec.decode(data.get("details", {}).get(context, {}))
+        installations = installation_list.get("res", {}).get("json", {}).get("values", [])
 
         installation = next( (install for install in installations if install.get("installation_id", "") == install_id_org), {})
 
@@ -347,7 +558,7 @@ class DabPumpsApi:
     async def async_fetch_device_statusses(self, device):
         """Fetch the statusses for a DAB Pumps device, which then constitues the Sensors"""
     
-        serial = device.serial.removesuffix(SIMULATE_SUFFIX_ID)
+        serial = DabPumpsSimulate.original_id(device.serial)
 
         context = f"statusses {serial}"
         verb = "GET"
@@ -363,7 +574,7 @@ class DabPumpsApi:
     async def async_change_device_status(self, status, value):
         """Set a new status value for a DAB Pumps device"""
 
-        serial = status.serial.removesuffix(SIMULATE_SUFFIX_ID)
+        serial = DabPumpsSimulate.original_id(status.serial)
         
         context = f"set {serial}:{status.key}"
         verb = "POST"
@@ -393,35 +604,89 @@ class DabPumpsApi:
 
     async def _async_send_request(self, context, verb, url, params=None, data=None, json=None, hdrs=None, client=None):
         """GET or POST a request for JSON data"""
-        (data, _, _) = await self._async_send_request_ex(context, verb, url, params=params, data=data, json=json, hdrs=hdrs, client=client, diagnostics=True)
+        (data, _) = await self._async_send_request_ex(context, verb, url, params=params, data=data, json=json, hdrs=hdrs, client=client, diagnostics=True)
         return data
     
 
     async def _async_send_request_ex(self, context, verb, url, params=None, data=None, json=None, hdrs=None, client=None, diagnostics=True):
         """
         GET or POST a request for JSON data.
-        Also returns the request and response performed
+        Also returns the envelope holding the request and response performed
         """
         client = client or self._client
 
+        # Wait for our turn; the time spent waiting is not part of the request latency
+        category = DabPumpsRequestStats.category(context)
+        await self._limiter.async_acquire(API_PRIORITY.get(category, API_PRIORITY_DEFAULT), category)
+
         timestamp = datetime.now()
         request = client.build_request(verb, url, params=params, data=data, json=json, headers=hdrs)
-        response = await client.send(request)
+
+        # Keep track of latency, errors and bytes transferred for this kind of request
+        start = time.perf_counter()
+        elapsed = None
+        envelope = None
+        error = None
+        success = False
+        try:
+            if self._fault_injector:
+                response = await self._fault_injector.async_send(context, request, client.send)
+            else:
+                response = await client.send(request)
+            elapsed = time.perf_counter() - start
+
+            envelope = DabPumpsApiResponse(request, response, elapsed)
+            result = await self._async_handle_response(timestamp, context, url, envelope, diagnostics)
+            success = True
+            return (result, envelope)
+
+        except Exception as ex:
+            error = ex
+            raise
+
+        finally:
+            elapsed = elapsed if elapsed is not None else time.perf_counter() - start
+            bytes_received = len(envelope.response.content) if envelope else 0
+            self._request_stats.add(context, elapsed, success, len(request.content), bytes_received)
+
+            if self._recorder:
+                # A failure to record must not replace the result or exception of the request itself
+                try:
+                    await self._recorder.async_record(context, request, envelope, elapsed, error)
+                except Exception as ex:
+                    _LOGGER.warning(f"Failed to record request '{context}': {ex}")
+
+
+    async def _async_handle_response(self, timestamp, context, url, envelope, diagnostics):
+        """
+        Decode and check the response of a request.
+        Returns the result
+        """
+        # The envelope decodes the response body only once and shares it with the diagnostics.
+        # Decode it before the diagnostics worker gets to it, so a large body can be decoded in the executor
+        response = envelope.response
+        if response.is_success and envelope.is_json:
+            await envelope.async_decode(self._host, self._loop_timer)
         
         # Save the diagnostics if requested
         if diagnostics:
-            await self._async_update_diagnostics(timestamp, context, request, response)
+            await self._async_update_diagnostics(timestamp, context, envelope)
         
         # Check response
+        if response.status_code == 401:
+            error = f"Authentication failed: {response.status_code} {response.reason_phrase} while trying to reach {url}"
+            _LOGGER.debug(error)    # logged as warning after last retry
+            raise DabPumpsApiAuthError(error)
+
         if not response.is_success:
             error = f"Unable to perform request, got response {response.status_code} {response.reason_phrase} while trying to reach {url}"
             _LOGGER.debug(error)    # logged as warning after last retry
             raise DabPumpsApiError(error)
         
-        if not response.headers.get('content-type','').startswith('application/json'):
-            return (response.text, request, response)
+        if not envelope.is_json:
+            return response.text
         
-        result = response.json()
+        result = envelope.json
         
         # if the result structure contains a 'res' value, then check it
         res = result.get('res', None)
@@ -430,7 +695,11 @@ class DabPumpsApi:
             code = result.get('code', '')
             msg = result.get('msg', '')
             
-            if code in ['FORBIDDEN']:
+            if code in ['FORBIDDEN'] and 'token' in msg.lower():
+                error = f"Authentication failed: {res} {code} {msg}"
+                _LOGGER.debug(error)    # logged as warning after last retry
+                raise DabPumpsApiAuthError(error)
+            elif code in ['FORBIDDEN']:
                 error = f"Authorization failed: {res} {code} {msg}"
                 _LOGGER.debug(error)    # logged as warning after last retry
                 raise DabPumpsApiRightsError(error)
@@ -439,7 +708,7 @@ class DabPumpsApi:
                 _LOGGER.debug(error)    # logged as warning after last retry
                 raise DabPumpsApiError(error)
         
-        return (result, request, response)
+        return result
 
 
     async def async_get_diagnostics(self) -> dict[str, Any]:
@@ -449,7 +718,7 @@ class DabPumpsApi:
         data = await self._history_store.async_get_data() or {}
         counter = data.get("counter", {})
         history = data.get("history", [])
-        details = data.get("details", {})
+        details = { key: DabPumpsStoreCodec.decode(detail) for key, detail in data.get("details", {}).items() }
         
         calls_total = sum([ n for key, n in counter.items() ]) or 1
         calls_counter = { key: n for key, n in counter.items() }
@@ -462,8 +731,12 @@ class DabPumpsApi:
             },
             "data": {
                 "login_method": self._login_method,
+                "login_methods": self._login_stats,
             },
             "diagnostics": {
+                "requests": self._request_stats.as_dict(),
+                "limiter": self._limiter.as_dict(),
+                "loop_blocked": self._loop_timer.as_dict(),
                 "counter": calls_counter,
                 "percent": calls_percent,
                 "history": history,
@@ -472,41 +745,50 @@ class DabPumpsApi:
         }
     
     
-    async def _async_update_diagnostics(self, timestamp, context, request, response, token=None):
+    async def _async_update_diagnostics(self, timestamp, context, envelope, token=None):
         # worker function
-        async def _async_worker(self, timestamp, context, request, response, token):
-            item = DabPumpsApiHistoryItem(timestamp, context, request, response, token)
-            detail = DabPumpsApiHistoryDetail(timestamp, context, request, response, token)
-            
+        async def _async_worker(self, timestamp, context, envelope, token):
             # Persist this history in file instead of keeping in memory
             if not self._history_store:
                 return None
+
+            with self._loop_timer.measure("redact"):
+                item = DabPumpsApiHistoryItem(timestamp, context, envelope, token)
+                item = async_redact_data(item, DIAGNOSTICS_REDACT)
+
+                detail = DabPumpsApiHistoryDetail(timestamp, context, envelope, token)
+                detail = async_redact_data(detail, DIAGNOSTICS_REDACT)
             
-            data = await self._history_store.async_get_data() or {}
-            counter = data.get("counter", {})
-            history = data.get("history", [])
-            details = data.get("details", {})
-            
-            if context in counter:
-                counter[context] += 1
-            else:
-                counter[context] = 1
-            
-            history.append( async_redact_data(item, DIAGNOSTICS_REDACT) )
-            if len(history) > 64:
-                history.pop(0)
-            
-            details[context] = async_redact_data(detail, DIAGNOSTICS_REDACT)
-            
-            data["history"] = history
-            data["counter"] = counter
-            data["details"] = details
-            await self._history_store.async_set_data(data)
+            # Compress the detail outside of the event loop; it can hold a large response json
+            detail = await self._host.async_add_executor_job(DabPumpsStoreCodec.encode, detail)
+
+            def _update(data):
+                counter = data.get("counter", {})
+                history = data.get("history", [])
+                details = data.get("details", {})
+                
+                if context in counter:
+                    counter[context] += 1
+                else:
+                    counter[context] = 1
+                
+                history.append(item)
+                if len(history) > 64:
+                    history.pop(0)
+                
+                details[context] = detail
+                
+                data["history"] = history
+                data["counter"] = counter
+                data["details"] = details
+                return data
+
+            await self._history_store.async_update(_update)
 
         # Create the worker task to update diagnostics in the background,
         # but do not let main loop wait for it to finish
-        if self._hass:
-            self._hass.async_create_task(_async_worker(self, timestamp, context, request, response, token))
+        if self._host:
+            self._host.async_create_task(_async_worker(self, timestamp, context, envelope, token))
 
 
     async def _async_cleanup_diagnostics(self):
@@ -518,14 +800,16 @@ class DabPumpsApi:
             
             # Only the counter part is reset.
             # We retain the history and details information as we rely on it if communication to DAB Pumps fails.
-            data = await self._history_store.async_get_data() or {}
-            data["counter"] = {}
-            await self._history_store.async_set_data(data)
+            def _update(data):
+                data["counter"] = {}
+                return data
+
+            await self._history_store.async_update(_update)
 
         # Create the worker task to update diagnostics in the background,
         # but do not let main loop wait for it to finish
-        if self._hass:
-            self._hass.async_create_task(_async_worker(self))
+        if self._host:
+            self._host.async_create_task(_async_worker(self))
 
 
 class DabPumpsApiAuthError(Exception):
@@ -538,20 +822,21 @@ class DabPumpsApiError(Exception):
     """Exception to indicate generic error failure."""    
     
     
-class DabPumpsApiHistoryStore(Store[dict]):
+class DabPumpsApiHistoryStore:
     
     _STORAGE_VERSION_MAJOR = 2
     _STORAGE_VERSION_MINOR = 0
     _STORAGE_KEY_HISTORY = DOMAIN + ".api_history"
     
-    def __init__(self, hass, key):
-        super().__init__(
-            hass, 
+    def __init__(self, host, key):
+        self._store = host.create_store(
             key=self._STORAGE_KEY_HISTORY, 
             version=self._STORAGE_VERSION_MAJOR, 
-            minor_version=self._STORAGE_VERSION_MINOR
+            minor_version=self._STORAGE_VERSION_MINOR,
+            migrate_func=self._async_migrate_func,
         )
         self._key = key
+        self._lock = asyncio.Lock()
 
     
     async def _async_migrate_func(self, old_major_version, old_minor_version, old_data):
@@ -572,7 +857,7 @@ class DabPumpsApiHistoryStore(Store[dict]):
 
     async def async_get_data(self):
         """Load the persisted api_history file and return the data specific for this api instance"""
-        data = await super().async_load() or {}
+        data = await self._store.async_load() or {}
         data_self = data.get(self._key, {})
 
         return data_self
@@ -580,26 +865,128 @@ class DabPumpsApiHistoryStore(Store[dict]):
 
     async def async_set_data(self, data_self):
         """Save the data specific for this api instance into the persisted api_history file"""
-        data = await super().async_load() or {}
+        data = await self._store.async_load() or {}
         data[self._key] = data_self
 
-        await super().async_save(data)
+        await self._store.async_save(data)
+
+
+    async def async_update(self, update_func):
+        """
+        Change the data specific for this api instance via update_func(data), which returns the changed data.
+        Updates are serialized so none of them get lost.
+        """
+        async with self._lock:
+            data_self = await self.async_get_data() or {}
+            await self.async_set_data(update_func(data_self))
+
+
+class DabPumpsStoreCodec:
+    """
+    Optional compressed serialization for large entries in our persisted stores.
+    An encoded entry is a small dict holding the gzip compressed json in base64 form.
+    Entries that were persisted without compression are returned by decode as-is.
+    """
+
+    _CODEC = "gzip"
+
+    @staticmethod
+    def encode(data):
+        """Compress an entry; return it unchanged when compression is disabled or not worth it"""
+        if not STORE_COMPRESS or not data:
+            return data
+
+        raw = json_bytes(data)
+        if len(raw) < STORE_COMPRESS_MIN_SIZE:
+            return data
+
+        zipped = gzip.compress(raw, compresslevel=6, mtime=0)
+        return {
+            "codec": DabPumpsStoreCodec._CODEC,
+            "data": base64.b64encode(zipped).decode('ascii'),
+        }
+
+
+    @staticmethod
+    def decode(data):
+        """Decompress an entry, or return it as-is if it is in the legacy (plain json) format"""
+        if not DabPumpsStoreCodec.is_encoded(data):
+            return data
+
+        raw = gzip.decompress(base64.b64decode(data["data"]))
+        return json_loads(raw)
+
+
+    @staticmethod
+    def is_encoded(data):
+        return isinstance(data, dict) and data.get("codec") == DabPumpsStoreCodec._CODEC and isinstance(data.get("data"), str)
+
+
+class DabPumpsApiResponse:
+    """
+    Envelope around a performed request and its response.
+    The response body is decoded at most once, and the result is then shared between
+    the caller of the request and the history item and detail kept for diagnostics.
+    """
+
+    def __init__(self, request, response, elapsed=None):
+        self.request = request
+        self.response = response
+        self.elapsed = elapsed      # seconds; measured by us, as response.elapsed is only set by some transports
+        self._json = None
+        self._json_decoded = False
+
+
+    @property
+    def is_json(self):
+        return self.response is not None and self.response.headers.get('content-type','').startswith('application/json')
+
+
+    @property
+    def json(self):
+        """Decoded json body of the response, or None if the response does not hold json"""
+        if not self._json_decoded:
+            self._json = json_loads(self.response.content) if self.is_json else None
+            self._json_decoded = True
+
+        return self._json
+
+
+    async def async_decode(self, host, loop_timer):
+        """
+        Decode the json body of the response.
+        A large body is decoded in the executor so it does not block the event loop.
+        """
+        if self._json_decoded or not self.is_json:
+            return self._json
+
+        content = self.response.content
+        if EXECUTOR_OFFLOAD and host and len(content) >= EXECUTOR_MIN_BYTES:
+            loop_timer.add("decode", 0.0, offloaded=True)
+            self._json = await host.async_add_executor_job(json_loads, content)
+        else:
+            with loop_timer.measure("decode"):
+                self._json = json_loads(content)
+
+        self._json_decoded = True
+        return self._json
 
 
 class DabPumpsApiHistoryItem(dict):
-    def __init__(self, timestamp, context, request, response, token):
+    def __init__(self, timestamp, context, envelope, token):
         item = { 
             "ts": timestamp, 
             "op": context,
         }
 
         # If possible, add a summary of the response status_code and json res and code
+        response = envelope.response if envelope else None
         if response:
             rsp = []
             rsp.append(f"{response.status_code} {response.reason_phrase}")
             
-            if response.is_success and response.headers.get('content-type','').startswith('application/json'):
-                json = response.json()
+            if response.is_success and envelope.is_json:
+                json = envelope.json
 
                 if res := json.get('res', ''): 
                     rsp.append(f"res={res}")
@@ -617,11 +1004,12 @@ class DabPumpsApiHistoryItem(dict):
 
 
 class DabPumpsApiHistoryDetail(dict):
-    def __init__(self, timestamp, context, request, response, token):
+    def __init__(self, timestamp, context, envelope, token):
         item = { 
             "ts": timestamp, 
         }
 
+        request = envelope.request if envelope else None
         if request:
             req = {
                 "method": request.method,
@@ -630,26 +1018,27 @@ class DabPumpsApiHistoryDetail(dict):
             }
 
             if request.method == "POST":
-                content = str(request.content).lstrip('b').strip("'")
+                content = request.content
                 
                 if request.headers.get('content-type','').startswith('application/json'):
-                    req["json"] = json.loads(content)
+                    req["json"] = json_loads(content)
                 elif request.headers.get('content-type','').startswith('application/x-www-form-urlencoded'):
-                    req["data"] = dict(urllib.parse.parse_qsl(content))
+                    req["data"] = dict(urllib.parse.parse_qsl(content.decode('utf-8')))
                 else:
-                    req["content"] = content
+                    req["content"] = content.decode('utf-8', errors='replace')
 
             item["req"] = req
         
+        response = envelope.response if envelope else None
         if response:
             res = {
                 "status": f"{response.status_code} {response.reason_phrase}",
                 "headers": response.headers,
-                "elapsed": response.elapsed.total_seconds(),
+                "elapsed": envelope.elapsed,
             }
 
-            if response.is_success and response.headers.get('content-type','').startswith('application/json'):
-                res['json'] = response.json()
+            if response.is_success and envelope.is_json:
+                res['json'] = envelope.json
 
             item["res"] = res
 
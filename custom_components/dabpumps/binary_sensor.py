@@ -123,9 +123,9 @@ class DabPumpsBinarySensor(CoordinatorEntity, BinarySensorEntity, DabPumpsEntity
         # find the correct device and status corresponding to this sensor
         status = status_map.get(self.object_id)
 
-        # Update any attributes
+        # Update any attributes; re-create translated names after a change of language
         if status:
-            if self._update_attributes(status, False):
+            if self._update_attributes(status, self._is_string_map_changed()):
                 self.async_write_ha_state()
     
     
@@ -24,14 +24,22 @@ from homeassistant.const import (
 
 from .const import (
     DOMAIN,
+    COORDINATOR,
     DEFAULT_USERNAME,
     DEFAULT_PASSWORD,
     DEFAULT_POLLING_INTERVAL,
+    DEFAULT_POLLING_ADAPTIVE,
+    DEFAULT_DEVICE_INTERVAL,
     DEFAULT_LANGUAGE,
     CONF_INSTALL_ID,
     CONF_INSTALL_NAME,
     CONF_POLLING_INTERVAL,
+    CONF_POLLING_ADAPTIVE,
+    CONF_DEVICE_EXCLUDE,
+    CONF_DEVICE_INTERVALS,
     MSG_POLLING_INTERVAL,
+    MSG_POLLING_ADAPTIVE,
+    MSG_DEVICE_EXCLUDE,
     MSG_LANGUAGE,
     LANGUAGE_MAP,
     LANGUAGE_AUTO,
@@ -69,13 +77,21 @@ class ConfigFlowHandler(config_entries.ConfigFlow, domain=DOMAIN):
         self._install_id = None
         self._install_name = None
         self._errors = None
+
+        # api created by this flow; only kept once a config entry is created with it
+        self._api = None
     
     
     async def async_try_connection(self):
         """Test the username and password by connecting to the DConnect website"""
         _LOGGER.info("Trying connection...")
         
-        coordinator = DabPumpsCoordinatorFactory.create_temp(self._username, self._password)
+        # Use the api that the config entry will use, so it can continue with this session and installation list
+        self._async_drop_api()
+        coordinator = DabPumpsCoordinatorFactory.create_temp(self._username, self._password, shared=True)
+        if not DabPumpsApiFactory.is_registered(self.hass, self._username, self._password, coordinator.api):
+            # Not in use by another config entry yet
+            self._api = coordinator.api
         try:
             # Call the DabPumpsApi with the detect_device method
             self._install_map = await coordinator.async_config_flow_data()
@@ -92,7 +108,26 @@ class ConfigFlowHandler(config_entries.ConfigFlow, domain=DOMAIN):
         except Exception as e:
             self._errors = f"Unknown error: {e}"
         
+        # Do not keep the api of credentials that did not work
+        self._async_drop_api()
         return False
+
+
+    @callback
+    def _async_drop_api(self):
+        """Close the api created by this flow, unless it was handed over to a config entry"""
+        if not self._api:
+            return
+
+        api = self._api
+        self._api = None
+        self.hass.async_create_task(api.async_logout())
+
+
+    @callback
+    def async_remove(self) -> None:
+        """The flow was finished or aborted"""
+        self._async_drop_api()
     
     
     # This is step 1 for the user/pass function.
@@ -147,6 +182,11 @@ class ConfigFlowHandler(config_entries.ConfigFlow, domain=DOMAIN):
                 # Use install_id as unique_id for this config flow to avoid the same hub being setup twice
                 await self.async_set_unique_id(self._install_id)
                 self._abort_if_unique_id_configured()
+
+                # Hand the api with its session and installation list over to the entry
+                if self._api:
+                    DabPumpsApiFactory.register(self.hass, self._username, self._password, self._api)
+                    self._api = None
             
                 # Create the integration entry
                 return self.async_create_entry(
@@ -159,6 +199,7 @@ class ConfigFlowHandler(config_entries.ConfigFlow, domain=DOMAIN):
                     },
                     options = {
                         CONF_POLLING_INTERVAL: DEFAULT_POLLING_INTERVAL,
+                        CONF_POLLING_ADAPTIVE: DEFAULT_POLLING_ADAPTIVE,
                         CONF_LANGUAGE: DEFAULT_LANGUAGE,
                     }
                 )
@@ -196,8 +237,11 @@ class OptionsFlowHandler(config_entries.OptionsFlow):
             self.config_entry.options = {}
 
         self._polling_interval = None
+        self._polling_adaptive = None
         self._language_code = None
         self._language_name = None
+        self._device_exclude = None
+        self._device_intervals = None
         self._errors = None
 
         # Display actual system language name or fallback language name inside the LANGUAGE_MAP options
@@ -226,26 +270,24 @@ class OptionsFlowHandler(config_entries.OptionsFlow):
             self._errors = []
 
             self._polling_interval = user_input[MSG_POLLING_INTERVAL]
+            self._polling_adaptive = user_input.get(MSG_POLLING_ADAPTIVE, DEFAULT_POLLING_ADAPTIVE)
             self._language_name = user_input.get(MSG_LANGUAGE, None)
             self._language_code = next( (code for code,name in self._language_map.items() if name == self._language_name), None)
 
             # Do we have everything we need?
             if not self._errors and self._language_code:
 
-                # Value of data will be set on the options property of the config_entry instance.
-                self.hass.config_entries.async_update_entry(
-                    self.config_entry,
-                    options = {
-                        CONF_POLLING_INTERVAL: self._polling_interval,
-                        CONF_LANGUAGE: self._language_code,
-                    } 
-                )
-                return self.async_create_entry(title=None, data=None)
+                # Continue with the per-device options if the devices of the installation are known
+                if self._get_device_map():
+                    return await self.async_step_devices()
+
+                return self._async_save_options()
 
             _LOGGER.error(f"Error: {self._errors}")
         
         else:
             self._polling_interval = self.config_entry.options.get(CONF_POLLING_INTERVAL, DEFAULT_POLLING_INTERVAL)
+            self._polling_adaptive = self.config_entry.options.get(CONF_POLLING_ADAPTIVE, DEFAULT_POLLING_ADAPTIVE)
             self._language_code = self.config_entry.options.get(CONF_LANGUAGE, DEFAULT_LANGUAGE)
             self._language_name = next( (name for code,name in self._language_map.items() if code == self._language_code), LANGUAGE_MAP[DEFAULT_LANGUAGE])
 
@@ -257,6 +299,7 @@ class OptionsFlowHandler(config_entries.OptionsFlow):
             data_schema=vol.Schema({
                 vol.Required(MSG_POLLING_INTERVAL, default=self._polling_interval): 
                     vol.All(vol.Coerce(int), vol.Range(min=5)),
+                vol.Required(MSG_POLLING_ADAPTIVE, default=self._polling_adaptive): bool,
                 vol.Required(MSG_LANGUAGE, default=self._language_name): selector({
                    "select": {
                       "options": [ name for name in self._language_map.values() ]
@@ -265,4 +308,74 @@ class OptionsFlowHandler(config_entries.OptionsFlow):
             }),
             errors = self._errors
         )
- 
\ No newline at end of file
+
+
+
+    async def async_step_devices(self, user_input: dict[str, Any] | None = None) -> FlowResult:
+        """Manage the polling of each device."""
+        device_map = self._get_device_map()
+        self._device_exclude = self.config_entry.options.get(CONF_DEVICE_EXCLUDE, [])
+        self._device_intervals = self.config_entry.options.get(CONF_DEVICE_INTERVALS, {})
+
+        if user_input is not None:
+            _LOGGER.debug(f"Options flow handle device input")
+
+            # Keep the settings of devices that are temporarily not part of the installation
+            self._device_exclude = [ serial for serial in self._device_exclude if serial not in device_map ] + user_input.get(MSG_DEVICE_EXCLUDE, [])
+            self._device_intervals = { serial: interval for serial, interval in self._device_intervals.items() if serial not in device_map }
+            for device in device_map.values():
+                interval = user_input.get(device.serial, DEFAULT_DEVICE_INTERVAL)
+                if interval != DEFAULT_DEVICE_INTERVAL:
+                    self._device_intervals[device.serial] = interval
+
+            return self._async_save_options()
+
+        # Show the form with an interval per device; 0 polls the device together with the installation
+        _LOGGER.debug(f"Options flow show device input form")
+
+        schema = {
+            vol.Optional(MSG_DEVICE_EXCLUDE, default=[ serial for serial in self._device_exclude if serial in device_map ]): selector({
+                "select": {
+                    "options": [ { "value": device.serial, "label": device.name } for device in device_map.values() ],
+                    "multiple": True,
+                }
+            }),
+        }
+        # Fields are keyed by serial; devices can have the same name, i.e. two pumps named after their product
+        for device in device_map.values():
+            schema[vol.Required(device.serial, default=self._device_intervals.get(device.serial, DEFAULT_DEVICE_INTERVAL))] = vol.All(vol.Coerce(int), vol.Range(min=0))
+
+        return self.async_show_form(
+            step_id = "devices",
+            data_schema = vol.Schema(schema),
+            description_placeholders = {
+                "devices": "\n".join([ f"{device.serial}: {device.name}" for device in device_map.values() ]),
+            },
+            errors = self._errors
+        )
+
+
+    def _get_device_map(self):
+        """Devices of the installation, as known by its running coordinator"""
+        install_id = self.config_entry.data[CONF_INSTALL_ID]
+        coordinator = self.hass.data.get(DOMAIN, {}).get(COORDINATOR, {}).get(install_id, None)
+        return coordinator.device_map if coordinator else {}
+
+
+    @callback
+    def _async_save_options(self):
+        # Value of data will be set on the options property of the config_entry instance.
+        options = {
+            CONF_POLLING_INTERVAL: self._polling_interval,
+            CONF_POLLING_ADAPTIVE: self._polling_adaptive,
+            CONF_LANGUAGE: self._language_code,
+            CONF_DEVICE_EXCLUDE: self.config_entry.options.get(CONF_DEVICE_EXCLUDE, []),
+            CONF_DEVICE_INTERVALS: self.config_entry.options.get(CONF_DEVICE_INTERVALS, {}),
+        }
+        if self._device_exclude is not None:
+            options[CONF_DEVICE_EXCLUDE] = self._device_exclude
+        if self._device_intervals is not None:
+            options[CONF_DEVICE_INTERVALS] = self._device_intervals
+
+        self.hass.config_entries.async_update_entry(self.config_entry, options=options)
+        return self.async_create_entry(title=None, data=None)
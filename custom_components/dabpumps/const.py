@@ -5,6 +5,7 @@ import types
 from homeassistant.const import (
     CONF_USERNAME,
     CONF_PASSWORD,
+    CONF_LANGUAGE,
 )
 from homeassistant.const import Platform
 
@@ -27,22 +28,34 @@ PLATFORMS: list[Platform] = [
 HUB = "Hub"
 API = "Api"
 COORDINATOR = "Coordinator"
+SCHEDULER = "Scheduler"
 HELPER = "Helper"
 
 DEFAULT_USERNAME = ""
 DEFAULT_PASSWORD = ""
 DEFAULT_POLLING_INTERVAL = 20
+DEFAULT_POLLING_ADAPTIVE = False
+DEFAULT_DEVICE_INTERVAL = 0     # seconds; 0 polls the device on every poll of the installation
 DEFAULT_LANGUAGE = "auto"
 
 CONF_INSTALL_ID = "install_id"
 CONF_INSTALL_NAME = "install_name"
 CONF_OPTIONS = "options"
 CONF_POLLING_INTERVAL = "polling_interval"
+CONF_POLLING_ADAPTIVE = "polling_adaptive"
+CONF_DEVICE_EXCLUDE = "device_exclude"       # list of device serials that are not polled
+CONF_DEVICE_INTERVALS = "device_intervals"   # dict of device serial to seconds between polls of that device
+
+# Options that a running coordinator applies without a reload of the config entry
+OPTIONS_APPLY_LIVE = [CONF_POLLING_INTERVAL, CONF_POLLING_ADAPTIVE, CONF_DEVICE_INTERVALS, CONF_LANGUAGE]
 
 MSG_POLLING_INTERVAL = 'polling_interval'
+MSG_POLLING_ADAPTIVE = 'polling_adaptive'
+MSG_DEVICE_EXCLUDE = 'device_exclude'
 MSG_LANGUAGE = 'language'
 
 DIAGNOSTICS_REDACT = { CONF_PASSWORD, 'client_secret' }
+API_RECORD_REDACT = DIAGNOSTICS_REDACT | { CONF_USERNAME, 'email', 'access_token', 'refresh_token', 'id_token', 'token' }
 
 ATTR_PRODUCT_DESCRIPTION = "Product Description"
 ATTR_DESTINATION_NAME = "Destination Name"
@@ -97,6 +110,40 @@ DABPUMPS_API_TOKEN_TIME_MIN = 10 # seconds remaining before we re-login
 
 COORDINATOR_RETRY_ATTEMPTS = 10
 COORDINATOR_RETRY_DELAY = 5    # seconds
+# Categories of errors; only an auth error drops the session before a retry, a rights error is retried once with a new session
+ERROR_AUTH = "auth"
+ERROR_RIGHTS = "rights"
+ERROR_TRANSIENT = "transient"
+ERROR_DATA = "data"
+# Requests that were forbidden this many times in a row for a role are skipped, and served from cache, for a while
+COORDINATOR_FORBIDDEN_STRIKES = 2
+COORDINATOR_FORBIDDEN_TTL = 3600    # seconds
+COORDINATOR_STALL_THRESHOLD = 100   # ms the event loop may be blocked during one poll before it is flagged
+COORDINATOR_LOOP_STAGES = ['decode', 'status', 'config', 'strings', 'redact', 'dispatch']
+
+# Adaptive polling: poll faster while the pump shows activity, back off while all values stay static
+COORDINATOR_ADAPTIVE_MIN_INTERVAL = 5       # seconds, while active
+COORDINATOR_ADAPTIVE_MAX_INTERVAL = 300     # seconds, after a long static period
+COORDINATOR_ADAPTIVE_BACKOFF = 1.5          # factor applied to the interval after each static poll
+COORDINATOR_ADAPTIVE_STATIC_POLLS = 3       # static polls at the configured interval before backing off
+COORDINATOR_ADAPTIVE_KEYS = [               # statusses that change when the pump runs, delivers flow or consumes power
+    'PumpStatus',
+    'SO_PumpRunSeconds',
+    'HO_PumpRunHours',
+    'StartNumber',
+    'VF_FlowLiter',
+    'FCt_Total_Delivered_Flow_mc',
+    'FCp_Partial_Delivered_Flow_mc',
+    'Actual_Period_Flow_Counter',
+    'PO_OutputPower',
+    'TotalEnergy',
+    'PartialEnergy',
+]
+
+# Align the polls of all installations of one account into one batched cycle with a single login
+SCHEDULER_BATCH = True
+
+API_CONTEXT_CATEGORIES = ['login', 'statusses', 'configuration', 'set', 'localization']
 
 API_LOGIN = types.SimpleNamespace()
 API_LOGIN.DABLIVE_APP_0 = 'DabLive_app_0'
@@ -104,13 +151,57 @@ API_LOGIN.DABLIVE_APP_1 = 'DabLive_app_1'
 API_LOGIN.DCONNECT_APP = 'DConnect_app'
 API_LOGIN.DCONNECT_WEB = 'DConnect_web'
 
+# The login method that works for an account is remembered across restarts.
+# Optional: set this constant to True to also remember the still valid token. Note that the token is then
+# written in plain text into the api_history file in the .storage folder of the config dir.
+API_LOGIN_PERSIST_TOKEN = False
+
+# An installation list fetched less than this many seconds ago (i.e. by the config flow) is reused instead of fetched again
+API_INSTALL_LIST_REUSE = 300
+
 API_CLIENT_TIMEOUT = 120.0
 
+# Requests per account are limited by a token bucket. Requests that have to wait are queued by priority of their
+# context category; lower goes first. Writes requested by the user go before logins, polls and daily refreshes.
+API_RATE_LIMIT = 10.0   # requests per second; 0 disables the limiter
+API_RATE_BURST = 20     # requests that can be sent at once after a quiet period
+API_PRIORITY = { 'set': 0, 'login': 1, 'statusses': 2 }
+API_PRIORITY_DEFAULT = 3
+
+# Large entries in the coordinator cache and api history store are written gzip compressed.
+# Entries persisted in the older plain json format are still read transparently.
+STORE_COMPRESS = True
+STORE_COMPRESS_MIN_SIZE = 1024 # bytes; smaller entries are kept as plain json
+
+# Large response bodies are decoded, and large configurations and translations are processed,
+# in the executor instead of on the event loop.
+EXECUTOR_OFFLOAD = True
+EXECUTOR_MIN_BYTES = 65536  # response body size from which json decoding is offloaded
+EXECUTOR_MIN_ITEMS = 200    # number of params, statusses or strings from which processing is offloaded
+
+# Optional: set this constant to True to let coordinators keep only the translations of the params and values
+# in their device configurations and of the current values of label statusses. Other strings, i.e. label values
+# that show up later, are looked up in the persisted translations when first used.
+STRINGS_TRIM = False
+STRINGS_MISSES_MAX = 200    # strings looked up in the persisted translations at most, per coordinator
+
+# Debug: set this constant to True to record all api requests and responses (redacted) into a fixture file
+# in the config dir, for replay via DabPumpsApiReplayTransport
+API_RECORD = False
+
 # Debug: set this constant to True to simulate a configuration with multiple installations for one DAB account
 SIMULATE_MULTI_INSTALL = False
 SIMULATE_SUFFIX_ID = "_test"
 SIMULATE_SUFFIX_NAME = " (test)"
 
+# Debug: synthetic load to scale-test with many installations and devices.
+# Each installation is simulated SIMULATE_INSTALL_FACTOR times and each device SIMULATE_DEVICE_FACTOR times.
+# The first copy gets suffix '_test', next ones '_test2', '_test3', etc. All copies fetch the data of the original.
+# Each poll, SIMULATE_STATUS_CHURN is the fraction of measurements of simulated devices that gets a changed value.
+SIMULATE_INSTALL_FACTOR = 2 if SIMULATE_MULTI_INSTALL else 1
+SIMULATE_DEVICE_FACTOR = 1
+SIMULATE_STATUS_CHURN = 0.0
+
 
 STARTUP_MESSAGE = f"""
 ----------------------------------------------------------------------------
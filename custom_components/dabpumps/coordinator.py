@@ -2,7 +2,9 @@ import asyncio
 import async_timeout
 import json
 import logging
+import random
 import re
+import weakref
 
 from collections import namedtuple
 from datetime import datetime, timedelta, timezone
@@ -19,7 +21,6 @@ from homeassistant.core import HomeAssistant
 from homeassistant.core import async_get_hass
 from homeassistant.exceptions import ConfigEntryAuthFailed
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
-from homeassistant.helpers.storage import Store
 from homeassistant.helpers.update_coordinator import (
     CoordinatorEntity,
     DataUpdateCoordinator,
@@ -37,13 +38,29 @@ from .api import (
     DabPumpsApiAuthError,
     DabPumpsApiRightsError,
     DabPumpsApiError,
+    DabPumpsStoreCodec,
+)
+from .scheduler import (
+    DabPumpsSchedulerFactory,
+)
+from .host import (
+    DabPumpsHassHost,
+)
+from .metrics import (
+    DabPumpsLoopTimer,
+    METRIC_GAUGE,
+    METRIC_COUNTER,
 )
 
 from .const import (
     DOMAIN,
     NAME,
     COORDINATOR,
+    API,
+    SCHEDULER,
     DEFAULT_POLLING_INTERVAL,
+    DEFAULT_POLLING_ADAPTIVE,
+    DEFAULT_DEVICE_INTERVAL,
     DEFAULT_LANGUAGE,
     LANGUAGE_MAP,
     LANGUAGE_AUTO,
@@ -52,12 +69,42 @@ from .const import (
     CONF_INSTALL_NAME,
     CONF_OPTIONS,
     CONF_POLLING_INTERVAL,
+    CONF_POLLING_ADAPTIVE,
+    CONF_DEVICE_EXCLUDE,
+    CONF_DEVICE_INTERVALS,
+    OPTIONS_APPLY_LIVE,
     DIAGNOSTICS_REDACT,
     COORDINATOR_RETRY_ATTEMPTS,
     COORDINATOR_RETRY_DELAY,
-    SIMULATE_MULTI_INSTALL,
-    SIMULATE_SUFFIX_ID,
-    SIMULATE_SUFFIX_NAME,
+    COORDINATOR_STALL_THRESHOLD,
+    COORDINATOR_FORBIDDEN_STRIKES,
+    COORDINATOR_FORBIDDEN_TTL,
+    ERROR_AUTH,
+    ERROR_RIGHTS,
+    ERROR_TRANSIENT,
+    ERROR_DATA,
+    COORDINATOR_LOOP_STAGES,
+    COORDINATOR_ADAPTIVE_MIN_INTERVAL,
+    COORDINATOR_ADAPTIVE_MAX_INTERVAL,
+    COORDINATOR_ADAPTIVE_BACKOFF,
+    COORDINATOR_ADAPTIVE_STATIC_POLLS,
+    COORDINATOR_ADAPTIVE_KEYS,
+    SCHEDULER_BATCH,
+    API_CONTEXT_CATEGORIES,
+    EXECUTOR_OFFLOAD,
+    EXECUTOR_MIN_ITEMS,
+    STRINGS_TRIM,
+    STRINGS_MISSES_MAX,
+    SIMULATE_INSTALL_FACTOR,
+    SIMULATE_DEVICE_FACTOR,
+    SIMULATE_STATUS_CHURN,
+)
+from .simulate import (
+    DabPumpsSimulate,
+)
+from .registry import (
+    DabPumpsStringsRegistry,
+    DabPumpsConfigRegistry,
 )
 
 
@@ -68,6 +115,7 @@ DabPumpsDevice = namedtuple('DabPumpsDevice', 'id, serial, name, vendor, product
 DabPumpsConfig = namedtuple('DabPumpsConfig', 'id, label, description, meta_params')
 DabPumpsParams = namedtuple('DabPumpsParams', 'key, type, unit, weight, values, min, max, family, group, view, change, log, report')
 DabPumpsStatus = namedtuple('DabPumpsStatus', 'serial, unique_id, key, val')
+DabPumpsMetric = namedtuple('DabPumpsMetric', 'key, name, unit, val, state')
 
 
 class DabPumpsCoordinatorFactory:
@@ -94,18 +142,53 @@ class DabPumpsCoordinatorFactory:
             # Get an instance of the DabPumpsApi for these credentials
             # This instance may be shared with other coordinators that use the same credentials
             api = DabPumpsApiFactory.create(hass, username, password)
+
+            # Polls of all installations that share this api are batched into one cycle
+            scheduler = DabPumpsSchedulerFactory.create(hass, username, password, api) if SCHEDULER_BATCH else None
         
             # Get an instance of our coordinator. This is unique to this install_id
-            coordinator = DabPumpsCoordinator(hass, api, install_id, options)
+            coordinator = DabPumpsCoordinator(hass, api, install_id, options, scheduler)
             hass.data[DOMAIN][COORDINATOR][install_id] = coordinator
             
         return coordinator
 
     @staticmethod
-    def create_temp(username, password):
+    async def async_remove(hass: HomeAssistant, config_entry: ConfigEntry):
+        """
+        Remove the Coordinator of a config entry that is unloaded.
+        The DabPumpsApi and scheduler shared with other installations of the same account are only removed
+        together with the last coordinator that uses them
+        """
+        username = config_entry.data[CONF_USERNAME]
+        password = config_entry.data[CONF_PASSWORD]
+        install_id = config_entry.data[CONF_INSTALL_ID]
+
+        coordinator = hass.data[DOMAIN].get(COORDINATOR, {}).pop(install_id, None)
+        if not coordinator:
+            return
+        
+        coordinator.close()
+
+        # Is the api still in use by the coordinator of another installation?
+        api = coordinator.api
+        if any(other.api is api for other in hass.data[DOMAIN][COORDINATOR].values()):
+            return
+        
+        _LOGGER.debug(f"Remove api for '{username}' together with its last installation {install_id}")
+        key = DabPumpsApiFactory.create_key(username, password)
+        hass.data[DOMAIN].get(API, {}).pop(key, None)
+        hass.data[DOMAIN].get(SCHEDULER, {}).pop(key, None)
+        await api.async_logout()
+
+
+    @staticmethod
+    def create_temp(username, password, shared=False):
         """
         Get temporary Coordinator for a given username+password.
-        This coordinator will only provide limited functionality
+        This coordinator will only provide limited functionality.
+        With shared=True it uses the DabPumpsApi that a config entry for these credentials uses or will use,
+        so its session and installation list can be handed over to the entry created by the config flow.
+        A new api is not stored until the config flow registers it via DabPumpsApiFactory.register
         """
     
         # Get properties from the config_entry
@@ -113,33 +196,34 @@ class DabPumpsCoordinatorFactory:
         install_id = None
         options = {}
         
-        # Get a temporary instance of the DabPumpsApi for these credentials
-        api = DabPumpsApiFactory.create_temp(hass, username, password)
+        # Get an instance of the DabPumpsApi for these credentials
+        if shared:
+            api = DabPumpsApiFactory.create(hass, username, password, register=False)
+        else:
+            api = DabPumpsApiFactory.create_temp(hass, username, password)
         
         # Get an instance of our coordinator. This is unique to this install_id
         coordinator = DabPumpsCoordinator(hass, api, install_id, options)
         return coordinator
     
 
-class DabPumpsCoordinator(DataUpdateCoordinator):
-    """My custom coordinator."""
+class DabPumpsCoordinatorCore:
+    """
+    Protocol and processing logic of the coordinator, independent of Home Assistant.
+    Uses a DabPumpsHost for storage, executor jobs and background tasks, so it can also run standalone.
+    """
     
-    def __init__(self, hass, api, install_id, options):
-        """Initialize my coordinator."""
-        super().__init__(
-            hass,
-            _LOGGER,
-            # Name of the data. For logging purposes.
-            name=NAME,
-            # Polling interval. Will only be polled if there are subscribers.
-            update_interval=timedelta(seconds=options.get(CONF_POLLING_INTERVAL, DEFAULT_POLLING_INTERVAL)),
-            update_method=self._async_update_data,
-        )
-
+    def __init__(self, host, api, install_id, options, scheduler=None):
+        self._host = host
         self._api = api
         self._install_id = install_id
         self._options = options
 
+        # optional scheduler that batches the polls of all installations sharing the api
+        self._scheduler = scheduler
+        if scheduler:
+            scheduler.register(self)
+
         self._install_map_ts = datetime.min
         self._install_map = {}
         self._device_map_ts = datetime.min
@@ -148,19 +232,98 @@ class DabPumpsCoordinator(DataUpdateCoordinator):
         self._config_map = {}
         self._status_map_ts = datetime.min
         self._status_map = {}
+        self._device_status_ts = {}
         self._string_map_ts = datetime.min
         self._string_map_lang = None
         self._string_map = {}
+        self._string_map_configs = set()
+        self._string_misses = set()
+        self._string_pending = set()
         self._user_role_ts = datetime.min
         self._user_role = 'CUSTOMER'
         
         # retry counter for diagnosis
         self._retries_needed = [ 0 for r in range(COORDINATOR_RETRY_ATTEMPTS) ]
+        self._poll_retries = 0
+
+        # number of failed requests per category of error, for diagnosis
+        self._error_counts = { category: 0 for category in [ERROR_AUTH, ERROR_RIGHTS, ERROR_TRANSIENT, ERROR_DATA] }
+
+        # random generator for the status churn of simulated devices
+        self._simulate_rnd = random.Random(install_id)
+
+        # requests that are known to be forbidden for the user role; key is (context, role)
+        self._forbidden_strikes = {}
+        self._forbidden_until = {}
+
+        # number of times persisted cached data was used because the API could not be reached, for diagnosis
+        self._cache_fallbacks = 0
+
+        # time the event loop was blocked while processing data, for diagnosis
+        self._loop_timer = DabPumpsLoopTimer()
+
+        # seconds until the next poll, adapted to pump activity if enabled in the options
+        self._poll_interval = options.get(CONF_POLLING_INTERVAL, DEFAULT_POLLING_INTERVAL)
+        self._poll_ts = datetime.min
+        self._activity_values = {}
+        self._static_polls = 0
 
         # Cached data in case communication to DAB Pumps fails
-        self._hass = hass
         self._store_key = install_id
-        self._store = DabPumpsCoordinatorStore(hass, self._store_key)
+        self._store = DabPumpsCoordinatorStore(host, self._store_key)
+
+
+    @property
+    def install_id(self):
+        return self._install_id
+
+
+    @property
+    def api(self):
+        return self._api
+
+
+    def close(self):
+        """Stop taking part in the batched polls of the account and release the shared translations and configurations"""
+        if self._scheduler:
+            self._scheduler.unregister(self)
+            self._scheduler = None
+
+        if self._string_map_lang:
+            DabPumpsStringsRegistry.release(self._string_map_lang, self)
+
+        for config_id in self._config_map.keys():
+            DabPumpsConfigRegistry.release(config_id, self)
+
+
+    @property
+    def device_map(self):
+        return self._device_map
+
+
+    @property
+    def status_map(self):
+        return self._status_map
+
+
+    def is_device_excluded(self, device):
+        """Devices excluded in the options are not polled and get no entities"""
+        return device.serial in self._options.get(CONF_DEVICE_EXCLUDE, [])
+
+
+    def get_device_interval(self, device):
+        """Seconds between polls of the statusses of a device, or 0 to poll it together with the installation"""
+        return self._options.get(CONF_DEVICE_INTERVALS, {}).get(device.serial, DEFAULT_DEVICE_INTERVAL)
+
+
+    def _is_device_status_due(self, device, now):
+        interval = self.get_device_interval(device)
+        if interval <= 0:
+            return True
+
+        # Polls happen at the interval of the installation; poll the device at the poll closest to its own interval
+        elapsed = (now - self._device_status_ts.get(device.serial, datetime.min)).total_seconds()
+        return elapsed + self._poll_interval / 2 >= interval
 
 
     @property
@@ -168,6 +331,125 @@ class DabPumpsCoordinator(DataUpdateCoordinator):
         return self._string_map
 
 
+    @property
+    def string_map_lang(self):
+        return self._string_map_lang
+
+
+    def get_string(self, key, resolve=True):
+        """
+        Translated string, or the string itself if there is no translation (yet).
+        Use resolve=False for raw values, which are not worth a lookup in the persisted translations.
+        """
+        val = self._string_map.get(key)
+        if val is not None:
+            return val
+
+        if not resolve or len(self._string_misses) >= STRINGS_MISSES_MAX:
+            return key
+
+        if STRINGS_TRIM and self._string_map_lang and key not in self._string_misses:
+            # Not one of the trimmed translations; look it up in the background
+            self._string_misses.add(key)
+            self._string_pending.add(key)
+            if len(self._string_pending) == 1:
+                self._host.async_create_task(self._async_resolve_strings())
+
+        return key
+
+
+    async def _async_resolve_strings(self):
+        """Add translations that were not kept in the trimmed string map, from the persisted translations"""
+        language = self._string_map_lang
+        try:
+            data = await DabPumpsStringsRegistry.async_load(self._host, language)
+        except Exception as ex:
+            _LOGGER.debug(f"Could not load persisted strings in language '{language}': {ex}")
+            data = {}
+
+        messages = data.get('messages', {})
+        keys = self._string_pending
+        self._string_pending = set()
+
+        if language != self._string_map_lang:
+            # Translations were swapped meanwhile
+            return
+
+        found = { key: messages[key] for key in keys if key in messages }
+        if found:
+            _LOGGER.debug(f"DAB Pumps strings resolved: {len(found)} of {len(keys)} in language '{language}'")
+            self._string_map.update(found)
+            self._string_misses.difference_update(found.keys())
+
+
+    @property
+    def poll_interval(self):
+        """Seconds until the next poll; varies with pump activity when adaptive polling is enabled"""
+        return self._poll_interval
+
+
+    def is_poll_due(self, now, slack=0):
+        """
+        True if the own interval of this coordinator has elapsed since its last poll.
+        Polls batched with other installations pass a slack, to join the batch closest to the interval
+        """
+        elapsed = (now - self._poll_ts).total_seconds()
+        return elapsed + slack >= self._poll_interval
+
+
+    @property
+    def metric_map(self):
+        """Performance metrics of this coordinator, exposed via diagnostic sensors"""
+        polls = self._loop_timer.polls
+        metrics = [
+            DabPumpsMetric(key="loop_poll", name="Event loop blocked per poll", unit="ms", val=round(polls["last_ms"], 1), state=METRIC_GAUGE),
+            DabPumpsMetric(key="loop_poll_max", name="Event loop blocked per poll max", unit="ms", val=round(polls["max_ms"], 1), state=METRIC_GAUGE),
+            DabPumpsMetric(key="loop_stalled_polls", name="Polls that stalled the event loop", unit=None, val=polls["stalled"], state=METRIC_COUNTER),
+            DabPumpsMetric(key="poll_interval", name="Polling interval", unit="s", val=round(self._poll_interval, 1), state=METRIC_GAUGE),
+            DabPumpsMetric(key="suppressed_requests", name="Suppressed forbidden requests", unit=None, val=len(self.suppressed_requests), state=METRIC_GAUGE),
+        ]
+        metrics += [
+            DabPumpsMetric(key=f"loop_{stage}", name=f"Event loop blocked by {stage}", unit="ms", val=round(polls["last_stages"].get(stage, 0.0), 1), state=METRIC_GAUGE)
+            for stage in COORDINATOR_LOOP_STAGES
+        ]
+
+        # Request statistics of the (shared) api for the account this installation belongs to
+        for category in API_CONTEXT_CATEGORIES:
+            stats = self._api.request_stats.get(category) or {}
+            metrics += [
+                DabPumpsMetric(key=f"api_{category}_p95", name=f"API {category} latency p95", unit="ms", val=stats.get("p95_ms"), state=METRIC_GAUGE),
+                DabPumpsMetric(key=f"api_{category}_errors", name=f"API {category} error rate", unit="%", val=stats.get("error_rate"), state=METRIC_GAUGE),
+                DabPumpsMetric(key=f"api_{category}_wait_p95", name=f"API {category} queue wait p95", unit="ms", val=(self._api.limiter.get_wait(category) or {}).get("p95_ms"), state=METRIC_GAUGE),
+            ]
+
+        # Requests of the account waiting for the rate limiter
+        metrics += [
+            DabPumpsMetric(key="api_queue_depth", name="API queue depth", unit=None, val=self._api.limiter.depth, state=METRIC_GAUGE),
+            DabPumpsMetric(key="api_queue_depth_max", name="API queue depth max", unit=None, val=self._api.limiter.max_depth, state=METRIC_GAUGE),
+        ]
+        return { metric.key: metric for metric in metrics }
+
+
+    @property
+    def retries_needed(self):
+        return self._retries_needed
+
+
+    @property
+    def cache_fallbacks(self):
+        return self._cache_fallbacks
+
+
+    @property
+    def suppressed_requests(self):
+        """Requests that are currently skipped because they were forbidden for the user role"""
+        now = datetime.now()
+        return [ 
+            { "context": context, "role": role, "until": until } 
+            for (context, role), until in self._forbidden_until.items() if until > now
+        ]
+
+
     @property
     def user_role(self):
         return self._user_role[0] # only use the first character
@@ -189,7 +471,7 @@ class DabPumpsCoordinator(DataUpdateCoordinator):
         Get HASS system language as set under Settings->System->General.
         Unless that language is not allowed in DConnect DAB LANGUAGE_MAP, in that case fallback to DEFAULT_LANGUAGE
         """
-        return self.hass.config.language.split('-', 1)[0] # split from 'en-GB' to just 'en'
+        return self._host.language.split('-', 1)[0] # split from 'en-GB' to just 'en'
 
 
     async def async_config_flow_data(self):
@@ -209,30 +491,40 @@ class DabPumpsCoordinator(DataUpdateCoordinator):
             raise UpdateFailed(f"Timeout while communicating with API: {err}")
     
     
-    async def _async_update_data(self):
+    async def async_poll(self):
         """
-        Fetch sensor data from API.
-        
-        This is the place to pre-process the data to lookup tables
-        so entities can quickly look up their data.
+        Fetch installation details, configurations, statusses and translations in one poll.
+        Returns True if the data was refreshed, or False if the API could not be reached and retries ran out
         """
-        _LOGGER.debug(f"Update data")
-
+        self._async_begin_poll()
         try:
-            # Note: asyncio.TimeoutError and aiohttp.ClientError are already
-            # handled by the data update coordinator.
-            async with async_timeout.timeout(60):
-                await self._async_detect_data()
-                
-                #_LOGGER.debug(f"device_map: {self._device_map}")
-                #_LOGGER.debug(f"config_map: {self._config_map}")
-                #_LOGGER.debug(f"status_map: {self._status_map}")
-                return (self._device_map, self._config_map, self._status_map)
-        
-        except asyncio.TimeoutError as err:
-            raise UpdateFailed(f"Timeout while communicating with API: {err}")
-    
-    
+            return await self._async_detect_data()
+        finally:
+            self._async_end_poll()
+
+
+    @callback
+    def _async_poll_pushed(self):
+        """Called by the scheduler when this coordinator was polled as part of a cycle started by another coordinator"""
+        self._async_end_poll()
+
+
+    @callback
+    def _async_begin_poll(self):
+        """Start measuring how long this poll blocks the event loop"""
+        self._poll_ts = datetime.now()
+        self._loop_timer.poll_begin()
+
+
+    @callback
+    def _async_end_poll(self):
+        """Close the poll in progress and flag it if it blocked the event loop for too long"""
+        (poll_ms, stalled) = self._loop_timer.poll_end(COORDINATOR_STALL_THRESHOLD)
+        if stalled:
+            stages = ', '.join([ f"{stage}={ms:.1f}" for stage, ms in self._loop_timer.polls["last_stages"].items() ])
+            _LOGGER.info(f"Poll for installation {self._install_id} blocked the event loop for {poll_ms:.1f} ms ({stages})")
+
+
     async def async_modify_data(self, object_id, value):
         """
         Set an entity param via the API.
@@ -274,79 +566,265 @@ class DabPumpsCoordinator(DataUpdateCoordinator):
                 return True;
             
             except Exception as ex:
-                error = str(ex)
-            
-            # Log off, end session and retry if possible
-            await self._api.async_logout();  
+                error = ex
             
-            if retry < COORDINATOR_RETRY_ATTEMPTS:
-                if retry < 2:
-                    _LOGGER.info(f"Retry {retry+1} in {COORDINATOR_RETRY_DELAY} seconds. {error}")
-                else:
-                    _LOGGER.warn(f"Retry {retry+1} in {COORDINATOR_RETRY_DELAY} seconds. {error}")
-                await asyncio.sleep(COORDINATOR_RETRY_DELAY)
+            if not await self._async_prepare_retry("installation list", retry, error):
+                break
             
         if error:
-            _LOGGER.warning(error)
+            _LOGGER.warning(str(error))
         
         self._retries_needed[retry] += 1
         return False
     
         
     async def _async_detect_data(self):
-        warnings = []
-        error = None
-        for retry in range(0, COORDINATOR_RETRY_ATTEMPTS):
+        """
+        Run all steps of a poll. A step that fails is retried on its own; devices and other steps
+        that already succeeded during this poll keep their fresh data.
+        """
+        # Decoding and redaction are done by the (shared) api; it adds the time spent on our requests to our timer.
+        # Polls of other installations that run at the same time, i.e. in a batch, run in their own task
+        token = DabPumpsLoopTimer.bind(self._loop_timer)
+        try:
+            return await self._async_detect_steps()
+        finally:
+            DabPumpsLoopTimer.unbind(token)
+
+
+    async def _async_detect_steps(self):
+        self._poll_retries = 0
+        try:
+            await self._async_retry("login", self._async_detect_login)
+
+            # Attempt to refresh installation details and devices when the cached one expires (once a day)
+            await self._async_retry(f"installation {self._install_id}", self._async_detect_install_details)
+
+            # Attempt to refresh device configurations (once a day), retried per device.
+            # Fetch device statusses (always), retried per device.
+            # A device that keeps failing does not stop the other devices and the translations from being refreshed
+            error = None
             try:
-                try:
-                    await self._api.async_login()
-                except:
-                    if len(self._device_map) > 0:
-                        # Force retry in loop by raising original exception
-                        raise
-                    else:
-                        # Ignore and use persisted cached data if this is the initial retrieve
-                        pass
-
-                # Attempt to refresh installation details and devices when the cached one expires (once a day)
-                await self._async_detect_install_details()
-
-                # Attempt to refresh device configurations (once a day)
                 await self._async_detect_device_configs()
+            except Exception as ex:
+                error = ex
 
-                # Fetch device statusses (always)
+            try:
                 await self._async_detect_device_statusses()
+            except Exception as ex:
+                error = error or ex
 
-                # Attempt to refresh the list of translations (once a day)
-                await self._async_detect_strings()
+            # Attempt to refresh the list of translations (once a day)
+            await self._async_retry(f"localization_{self.language}", self._async_detect_strings)
 
-                # Attempt to refresh the list of installations (once a day, just for diagnostocs)
-                await self._async_detect_installations(ignore_exception=True)
+            # Attempt to refresh the list of installations (once a day, just for diagnostocs)
+            await self._async_detect_installations(ignore_exception=True)
 
-                # Keep track of how many retries were needed until success
-                self._retries_needed[retry] += 1
-                return True;
+            if error:
+                raise error
+
+            # Poll faster or slower depending on the activity seen in the fetched statusses
+            self._update_poll_interval()
+
+            # Keep track of how many retries were needed until success
+            self._retries_needed[self._poll_retries] += 1
+            return True
+        
+        except Exception as ex:
+            _LOGGER.warning(str(ex))
+
+        self._retries_needed[self._poll_retries] += 1
+        return False
+
+
+    async def _async_retry(self, context, func, *args):
+        """
+        Run one step of a poll, retrying just that step if it fails.
+        Raises the last exception once all attempts have failed.
+        """
+        error = None
+        for retry in range(0, COORDINATOR_RETRY_ATTEMPTS):
+            self._poll_retries = max(self._poll_retries, retry)
+            try:
+                if retry > 0:
+                    # Login again if the session was dropped
+                    await self._async_detect_login()
+
+                await func(*args)
+                return
             
             except Exception as ex:
-                error = str(ex)
-            
-            # Log off, end session and retry if possible
-            await self._api.async_logout();  
-            
-            if retry < COORDINATOR_RETRY_ATTEMPTS:
-                if retry < 2:
-                    _LOGGER.info(f"Retry {retry+1} in {COORDINATOR_RETRY_DELAY} seconds. {error}")
-                else:
-                    _LOGGER.warn(f"Retry {retry+1} in {COORDINATOR_RETRY_DELAY} seconds. {error}")
-                await asyncio.sleep(COORDINATOR_RETRY_DELAY)
+                error = ex
             
-        if error:
-            _LOGGER.warning(error)
-        
-        self._retries_needed[retry] += 1
-        return False
-    
-        
+            if not await self._async_prepare_retry(context, retry, error):
+                break
+
+        raise error
+
+
+    async def _async_prepare_retry(self, context, retry, error):
+        """
+        Prepare for the next attempt after a failed request.
+        Only an auth failure drops the session; a still valid token is kept on transient and data failures.
+        Returns False if there is no point in another attempt.
+        """
+        if isinstance(error, DabPumpsSuppressedError):
+            # Known to be forbidden; another attempt would be skipped as well
+            return False
+
+        category = DabPumpsCoordinatorCore.classify_error(error)
+        self._error_counts[category] += 1
+
+        if retry+1 >= COORDINATOR_RETRY_ATTEMPTS:
+            return False
+
+        if category == ERROR_RIGHTS and retry > 0:
+            # Still forbidden with a new session; this account is not allowed to do this request
+            return False
+
+        if category in [ERROR_AUTH, ERROR_RIGHTS]:
+            # DAB Pumps may answer a dropped session as forbidden; log off, end session and retry once with a new one
+            await self._api.async_logout()
+
+        if retry < 2:
+            _LOGGER.info(f"Retry {retry+1} of {context} in {COORDINATOR_RETRY_DELAY} seconds after {category} error. {error}")
+        else:
+            _LOGGER.warn(f"Retry {retry+1} of {context} in {COORDINATOR_RETRY_DELAY} seconds after {category} error. {error}")
+        await asyncio.sleep(COORDINATOR_RETRY_DELAY)
+        return True
+
+
+    async def _async_fetch(self, context, func, *args):
+        """
+        Do a request via the API, unless it is known to be forbidden for the user role.
+        A skipped request raises DabPumpsSuppressedError, so the caller falls back to its cached data.
+        """
+        key = (context, self._user_role)
+        until = self._forbidden_until.get(key)
+        if until:
+            if until > datetime.now():
+                raise DabPumpsSuppressedError(f"Skipped request for {context}; forbidden for role {self._user_role} until {until.strftime('%H:%M:%S')}")
+            self._forbidden_until.pop(key)
+
+        try:
+            data = await func(*args)
+        except DabPumpsApiRightsError:
+            # A dropped session can also be answered as forbidden, so only suppress after repeated refusals
+            strikes = self._forbidden_strikes.get(key, 0) + 1
+            self._forbidden_strikes[key] = strikes
+            if strikes >= COORDINATOR_FORBIDDEN_STRIKES:
+                _LOGGER.info(f"Suppress requests for {context} for {COORDINATOR_FORBIDDEN_TTL} seconds; forbidden for role {self._user_role}")
+                self._forbidden_until[key] = datetime.now() + timedelta(seconds=COORDINATOR_FORBIDDEN_TTL)
+                self._forbidden_strikes.pop(key)
+            raise
+
+        self._forbidden_strikes.pop(key, None)
+        return data
+
+
+    @staticmethod
+    def classify_error(error):
+        """
+        Category of an error: auth (session invalid), rights (not allowed for this account),
+        data (unexpected response content) or transient (timeouts, connection problems, server errors)
+        """
+        if isinstance(error, DabPumpsApiAuthError):
+            return ERROR_AUTH
+        if isinstance(error, DabPumpsApiRightsError):
+            return ERROR_RIGHTS
+        if isinstance(error, (DabPumpsDataError, ValueError, KeyError, TypeError)):
+            return ERROR_DATA
+        return ERROR_TRANSIENT
+
+
+    async def _async_detect_login(self):
+        """
+        Login if the token has expired
+        """
+        try:
+            await self._api.async_login()
+        except:
+            if len(self._device_map) > 0:
+                # Force retry in calling function by raising original exception
+                raise
+            else:
+                # Ignore and use persisted cached data if this is the initial retrieve
+                pass
+
+
+    def _update_poll_interval(self):
+        """
+        Determine the interval until the next poll.
+        With adaptive polling, poll faster while statusses that reflect pump activity (run state, flow, power) change,
+        and gradually back off to a longer interval once they have stayed the same for a number of polls.
+        """
+        interval = self._options.get(CONF_POLLING_INTERVAL, DEFAULT_POLLING_INTERVAL)
+
+        if self._options.get(CONF_POLLING_ADAPTIVE, DEFAULT_POLLING_ADAPTIVE):
+            values = { entity_id: status.val for entity_id, status in self._status_map.items() if status.key in COORDINATOR_ADAPTIVE_KEYS }
+            active = any(
+                val is not None and self._activity_values.get(entity_id) not in (None, val)
+                for entity_id, val in values.items()
+            )
+            self._activity_values = values
+
+            if active:
+                self._static_polls = 0
+                interval = min(interval, max(COORDINATOR_ADAPTIVE_MIN_INTERVAL, interval // 2))
+            else:
+                self._static_polls += 1
+                if self._static_polls > COORDINATOR_ADAPTIVE_STATIC_POLLS:
+                    interval = max(interval, min(COORDINATOR_ADAPTIVE_MAX_INTERVAL, self._poll_interval * COORDINATOR_ADAPTIVE_BACKOFF))
+
+        if interval != self._poll_interval:
+            _LOGGER.debug(f"Polling interval for installation {self._install_id} changed from {self._poll_interval:.0f} to {interval:.0f} seconds")
+        self._set_poll_interval(interval)
+
+
+    def _set_poll_interval(self, interval):
+        self._poll_interval = interval
+
+
+    async def async_apply_options(self, options):
+        """
+        Apply changed options while running.
+        Returns False if one of the changed options requires the config entry to be reloaded
+        """
+        # Entries created by an older version lack options that the options flow now always writes
+        defaults = {
+            CONF_POLLING_INTERVAL: DEFAULT_POLLING_INTERVAL,
+            CONF_POLLING_ADAPTIVE: DEFAULT_POLLING_ADAPTIVE,
+            CONF_LANGUAGE: DEFAULT_LANGUAGE,
+            CONF_DEVICE_EXCLUDE: [],
+            CONF_DEVICE_INTERVALS: {},
+        }
+        changed = [ key for key in set(options) | set(self._options) if options.get(key, defaults.get(key)) != self._options.get(key, defaults.get(key)) ]
+        if any(key not in OPTIONS_APPLY_LIVE for key in changed):
+            return False
+
+        _LOGGER.info(f"Apply changed options {', '.join(changed)} for installation {self._install_id}")
+        self._options = options
+
+        # Restart (adaptive) polling from the configured interval
+        self._activity_values = {}
+        self._static_polls = 0
+        self._set_poll_interval(options.get(CONF_POLLING_INTERVAL, DEFAULT_POLLING_INTERVAL))
+
+        if self.language != self._string_map_lang:
+            # Swap in the translations of the new language; the current ones stay in use if they cannot be fetched
+            self._string_map_ts = datetime.min
+            try:
+                await self._async_retry(f"localization_{self.language}", self._async_detect_strings)
+            except Exception as ex:
+                _LOGGER.warning(f"Could not fetch translations for language '{self.language}'. Details: {ex}")
+
+            if self.language != self._string_map_lang:
+                # Try again during the next poll
+                self._string_map_ts = datetime.min
+
+        return True
+
+
     async def _async_change_device_status(self, status, value):
         error = None
         for retry in range(0, COORDINATOR_RETRY_ATTEMPTS):
@@ -360,20 +838,13 @@ class DabPumpsCoordinator(DataUpdateCoordinator):
                 return True
             
             except Exception as ex:
-                error = str(ex)
-            
-            # Log off, end session and retry if possible
-            await self._api.async_logout();  
+                error = ex
             
-            if retry < COORDINATOR_RETRY_ATTEMPTS:
-                if retry < 2:
-                    _LOGGER.info(f"Retry {retry+1} in {COORDINATOR_RETRY_DELAY} seconds. {error}")
-                else:
-                    _LOGGER.warn(f"Retry {retry+1} in {COORDINATOR_RETRY_DELAY} seconds. {error}")
-                await asyncio.sleep(COORDINATOR_RETRY_DELAY)
+            if not await self._async_prepare_retry(f"set {status.unique_id}", retry, error):
+                break
             
         if error:
-            _LOGGER.warning(error)
+            _LOGGER.warning(str(error))
         
         self._retries_needed[retry] += 1
         return False
@@ -390,7 +861,7 @@ class DabPumpsCoordinator(DataUpdateCoordinator):
         # Try to retrieve via API
         context = f"installation {self._install_id}"
         try:
-            data = await self._api.async_fetch_install_details(self._install_id)
+            data = await self._async_fetch(context, self._api.async_fetch_install_details, self._install_id)
             await self._async_process_install_data(data)
             await self._async_update_cache(context, data)
             ex = None
@@ -439,41 +910,66 @@ class DabPumpsCoordinator(DataUpdateCoordinator):
             # Not yet expired
             return
         
+        # Each device is retried on its own, so devices that succeed keep their fresh configuration
+        error = None
         for device in self._device_map.values():
+            if self.is_device_excluded(device):
+                continue
 
-            # First try to retrieve from API
-            context = f"configuration {device.config_id}"
             try:
-                data = await self._api.async_fetch_device_config(device)
-                await self._async_process_device_config_data(device, data)
-                await self._async_update_cache(context, data)
-                ex = None
-            except Exception as e:
-                if device.config_id in self._config_map:
-                    # Ignore problems if this is just a refresh
-                    ex = None
-                else:
-                    # Try next alternative while remembering original exception
-                    ex = e
-
-            if ex:
-                # Next try from persisted cache if this is the initial retrieve
-                try:
-                    data = await self._async_fetch_from_cache(context)
-                    await self._async_process_device_config_data(device, data)
-                    ex = None
-                except Exception:
-                    # Try next alternative while remembering original exception
-                    pass
+                await self._async_retry(f"configuration {device.config_id}", self._async_detect_device_config, device)
+            except Exception as ex:
+                error = ex
 
-            if ex:
-                # Force retry in calling function by raising original exception
-                raise ex
+        if error:
+            # Try again next poll; configurations that were fetched are served from the shared registry.
+            # Let the calling function know by raising original exception
+            self._config_map_ts = datetime.min
+            raise error
                     
         # If we reach this point, then all device configs have been fetched/refreshed
         self._config_map_ts = datetime.now()
 
 
+    async def _async_detect_device_config(self, device):
+        """
+        Fetch the configuration of one device, falling back to the persisted cache on the initial retrieve.
+        The configuration is shared with all other coordinators that have devices with the same config_id
+        """
+        # First try the shared configuration, downloaded by whichever coordinator needs it first
+        context = f"configuration {device.config_id}"
+        try:
+            config = await DabPumpsConfigRegistry.async_acquire(
+                self._host, device.config_id, self,
+                lambda: self._async_fetch(context, self._api.async_fetch_device_config, device),
+                lambda data: self._async_build_device_config(device, data),
+            )
+            self._config_map_ts = datetime.now()
+            self._config_map[config.id] = config
+            ex = None
+        except Exception as e:
+            if device.config_id in self._config_map:
+                # Ignore problems if this is just a refresh
+                ex = None
+            else:
+                # Try next alternative while remembering original exception
+                ex = e
+
+        if ex:
+            # Next try from the cache this installation persisted before configurations were shared
+            try:
+                data = await self._async_fetch_from_cache(context)
+                await self._async_process_device_config_data(device, data)
+                ex = None
+            except Exception:
+                # Try next alternative while remembering original exception
+                pass
+
+        if ex:
+            # Force retry in calling function by raising original exception
+            raise ex
+
+
     async def _async_detect_device_statusses(self):
         """
         Fetch device statusses (always)
@@ -482,55 +978,80 @@ class DabPumpsCoordinator(DataUpdateCoordinator):
             # Not yet expired
             return
         
-        for device in self._device_map.values():
-
-            # First try to retrieve from API
-            context = f"statusses {device.serial}"
-            try:
-                data = await self._api.async_fetch_device_statusses(device)
-                await self._async_process_device_status_data(device, data)
-                await self._async_update_cache(context, data)
-                ex = None
-            except Exception as e:
-                if any(status.serial==device.serial for status in self._status_map.values()):
-                    # Ignore problems if this is just a refresh
-                    ex = None
-                else:
-                    # Try next alternative while remembering original exception
-                    ex = e
-
-            if ex:
-                # Next try from (outdated) persisted cache if this is the initial retrieve.
-                # However, we will then set all values to unknown.
-                try:
-                    data = await self._async_fetch_from_cache(context)
-                    await self._async_process_device_status_data(device, data, expired_values=True)
-                    ex = None
-                except Exception:
-                    # Try next alternative while remembering original exception
-                    pass
-
+        # Each device is polled at its own interval; excluded devices are not polled at all
+        now = datetime.now()
+        devices = [ device for device in self._device_map.values() if not self.is_device_excluded(device) and self._is_device_status_due(device, now) ]
+
+        # Fetch the statusses of all devices at once instead of one after the other.
+        # Each device is retried on its own, so devices that succeed keep their fresh statusses.
+        # Their cache updates then also overlap; the coordinator store serializes them, so none get lost
+        results = await asyncio.gather(*[ self._async_retry(f"statusses {device.serial}", self._async_detect_device_status, device) for device in devices ], return_exceptions=True)
+        for ex in results:
             if ex:
-                # Force retry in calling function by raising original exception
+                # Let the calling function know by raising original exception
                 raise ex
 
         # If we reach this point, then all device statusses have been fetched/refreshed
         self._status_map_ts = datetime.now()
 
 
+    async def _async_detect_device_status(self, device):
+        """
+        Fetch the statusses of one device, falling back to the persisted cache on the initial retrieve
+        """
+        # First try to retrieve from API
+        context = f"statusses {device.serial}"
+        try:
+            data = await self._async_fetch(context, self._api.async_fetch_device_statusses, device)
+            await self._async_process_device_status_data(device, data)
+            await self._async_update_cache(context, data)
+            self._device_status_ts[device.serial] = datetime.now()
+            ex = None
+        except Exception as e:
+            if any(status.serial==device.serial for status in self._status_map.values()):
+                # Ignore problems if this is just a refresh
+                ex = None
+            else:
+                # Try next alternative while remembering original exception
+                ex = e
+
+        if ex:
+            # Next try from (outdated) persisted cache if this is the initial retrieve.
+            # However, we will then set all values to unknown.
+            try:
+                data = await self._async_fetch_from_cache(context)
+                await self._async_process_device_status_data(device, data, expired_values=True)
+                ex = None
+            except Exception:
+                # Try next alternative while remembering original exception
+                pass
+
+        if ex:
+            # Force retry in calling function by raising original exception
+            raise ex
+
+
     async def _async_detect_strings(self):
         """
-        Attempt to refresh the list of translations (once a day)
+        Attempt to refresh the list of translations (once a day).
+        The translations are shared with all other coordinators that use the same language
         """
+        config_ids = set(self._config_map.keys())
         if (datetime.now() - self._string_map_ts).total_seconds() < 86400:
-            # Not yet expired
-            return
+            if not STRINGS_TRIM or config_ids <= self._string_map_configs:
+                # Not yet expired
+                return
         
-        context = f"localization_{self.language}"
+        # First try the shared translations, downloaded by whichever coordinator needs them first
+        language = self.language
+        context = f"localization_{language}"
+        string_map = None
         try:
-            data = await self._api.async_fetch_strings(self.language)
-            await self._async_process_strings_data(data)
-            await self._async_update_cache(context, data)
+            string_map = await DabPumpsStringsRegistry.async_acquire(
+                self._host, language, self,
+                lambda: self._async_fetch(context, self._api.async_fetch_strings, language),
+                self._async_build_shared_string_map,
+            )
             ex = None
         except Exception as e:
             if len(self._string_map) > 0:
@@ -541,11 +1062,12 @@ class DabPumpsCoordinator(DataUpdateCoordinator):
                 ex = e
                 
         if ex:
-            # Next, try from persisted cache if this is the initial retrieve
+            # Next, try from the cache this installation persisted before translations were shared
             try:
                 data = await self._async_fetch_from_cache(context)
-                await self._async_process_strings_data(data)
-                ex = None
+                (_, string_map) = await self._async_build_string_map(data)
+                if string_map:
+                    ex = None
             except Exception:
                 # Try next alternative while remembering original exception
                 pass
@@ -554,8 +1076,34 @@ class DabPumpsCoordinator(DataUpdateCoordinator):
             # Force retry in calling function by raising original exception
             raise ex
 
+        if string_map:
+            if self._string_map_lang and self._string_map_lang != language:
+                DabPumpsStringsRegistry.release(self._string_map_lang, self)
+
+            if STRINGS_TRIM:
+                # Only keep the translations used by the device configurations
+                keys = self._get_string_keys()
+                string_map = await self._async_run_stage("strings", len(string_map), DabPumpsCoordinatorCore._build_trimmed_string_map, string_map, keys)
+
+            _LOGGER.debug(f"DAB Pumps strings found: {len(string_map)} in language '{language}'")
+            self._string_map_lang = language
+            self._string_map = string_map
+            self._string_map_configs = config_ids
+            self._string_misses = set()
+
         # If we reach this point, then all strings have been fetched/refreshed 
-        self._string_map_ts = datetime.now()
+        self._string_map_ts = datetime.now() if len(self._string_map) > 0 else datetime.min
+
+
+    async def _async_build_shared_string_map(self, data):
+        """
+        Build the string map that is shared with other coordinators from the translations data
+        """
+        (language, string_map) = await self._async_build_string_map(data)
+
+        if not string_map:
+            raise DabPumpsDataError(f"No strings found for language '{language}'")
+        return string_map
 
 
     async def _async_detect_installations(self, ignore_exception=False):
@@ -566,10 +1114,10 @@ class DabPumpsCoordinator(DataUpdateCoordinator):
             # Not yet expired
             return
         
-        # First try to retrieve from API.
+        # First try the list that was just fetched by the config flow or another installation, then the API.
         context = f"installation list"
         try:
-            data = await self._api.async_fetch_install_list()
+            data = self._api.get_recent_install_list() or await self._async_fetch(context, self._api.async_fetch_install_list)
             await self._async_process_install_list(data)
             await self._async_update_cache(context, data)
             ex = None
@@ -596,21 +1144,18 @@ class DabPumpsCoordinator(DataUpdateCoordinator):
         install_map = {}
         installations = data.get('values', [])
         
-        # Go through the list of installations twice,
-        # the second one to generate an extra dummy install for testing purposes
-        for test in [0,1]:
-            if test and not SIMULATE_MULTI_INSTALL:
-                break
-            
-            suffix_id = SIMULATE_SUFFIX_ID if test else ""
-            suffix_name = SIMULATE_SUFFIX_NAME if test else ""
+        # Go through the list of installations once for each copy,
+        # the next ones to generate extra simulated installs for testing purposes
+        for copy in range(max(1, SIMULATE_INSTALL_FACTOR)):
+            suffix_id = DabPumpsSimulate.suffix_id(copy)
+            suffix_name = DabPumpsSimulate.suffix_name(copy)
             
             for ins_idx, installation in enumerate(installations):
                 
                 ins_id = installation.get('installation_id', '')
                 ins_name = installation.get('name', None) or installation.get('description', None) or f"installation {ins_idx}"
                 
-                install_id = DabPumpsCoordinator.create_id(ins_id + suffix_id)
+                install_id = DabPumpsCoordinatorCore.create_id(ins_id + suffix_id)
                 install_name = ins_name + suffix_name
 
                 _LOGGER.debug(f"DAB Pumps installation found: {install_name}")
@@ -642,10 +1187,10 @@ class DabPumpsCoordinator(DataUpdateCoordinator):
         # Process installation details
         # Take into account that this may be an 'extra' generated installation for testing
         install_id = self._install_id
-        install_id_org = self._install_id.removesuffix(SIMULATE_SUFFIX_ID)
+        install_id_org = DabPumpsSimulate.original_id(install_id)
         
-        suffix_id = SIMULATE_SUFFIX_ID if install_id != install_id_org else ""
-        suffix_name = SIMULATE_SUFFIX_NAME if install_id != install_id_org else ""
+        install_suffix_id = install_id.removeprefix(install_id_org)
+        install_suffix_name = DabPumpsSimulate.suffix_name(DabPumpsSimulate.copy(install_id))
         
         # Find the current installation
         installation = data
@@ -672,30 +1217,35 @@ class DabPumpsCoordinator(DataUpdateCoordinator):
             if not dum_config: 
                 raise DabPumpsDataError(f"Could not find installation attribute 'configuration_id'")
 
-            device_id = DabPumpsCoordinator.create_id(dum_name + suffix_id)
-            device_serial = dum_serial + suffix_id
-            device_name = dum_name + suffix_name
-
-            device = DabPumpsDevice(
-                vendor = 'DAB Pumps',
-                name = device_name,
-                id = device_id,
-                serial = device_serial,
-                product = dum_product,
-                version = dum_version,
-                config_id = dum_config,
-                install_id = install_id,
-            )
-            device_map[device_serial] = device
+            # Each device is listed once for each copy, the next ones are simulated devices for testing purposes
+            for copy in range(max(1, SIMULATE_DEVICE_FACTOR)):
+                suffix_id = install_suffix_id + DabPumpsSimulate.suffix_id(copy)
+                suffix_name = install_suffix_name + DabPumpsSimulate.suffix_name(copy)
+
+                device_id = DabPumpsCoordinatorCore.create_id(dum_name + suffix_id)
+                device_serial = dum_serial + suffix_id
+                device_name = dum_name + suffix_name
+
+                device = DabPumpsDevice(
+                    vendor = 'DAB Pumps',
+                    name = device_name,
+                    id = device_id,
+                    serial = device_serial,
+                    product = dum_product,
+                    version = dum_version,
+                    config_id = dum_config,
+                    install_id = install_id,
+                )
+                device_map[device_serial] = device
 
-            # Keep track of config_id's and serials we have seen
-            if dum_config not in config_list:
-                config_list.append(dum_config) 
-            
-            if device_serial not in serial_list:
-                serial_list.append(device_serial)
-            
-            _LOGGER.debug(f"DAB Pumps device found: {device_name} with serial {device_serial}")
+                # Keep track of config_id's and serials we have seen
+                if dum_config not in config_list:
+                    config_list.append(dum_config) 
+                
+                if device_serial not in serial_list:
+                    serial_list.append(device_serial)
+                
+                _LOGGER.debug(f"DAB Pumps device found: {device_name} with serial {device_serial}")
             
         # Also detect the user role within this installation
         user_role = installation.get('user_role', 'CUSTOMER')
@@ -708,6 +1258,10 @@ class DabPumpsCoordinator(DataUpdateCoordinator):
         if len(device_map) == 0:
             return
         
+        # Configurations no longer used by any device of this installation are released, like translations of a previous language
+        for config_id in set(self._config_map.keys()) - set(config_map.keys()):
+            DabPumpsConfigRegistry.release(config_id, self)
+
         # Remember/update the found maps.
         self._device_map_ts = datetime.now()
         self._device_map = device_map
@@ -722,8 +1276,29 @@ class DabPumpsCoordinator(DataUpdateCoordinator):
         """
         Update device config for the installation
         """
-        config_map = {}
+        config = await self._async_build_device_config(device, data)
+
+        # Merge with configurations from other devices
+        self._config_map_ts = datetime.now()
+        self._config_map[config.id] = config
+
+
+    async def _async_build_device_config(self, device, data):
+        """
+        Build the config for a device from the configuration data
+        """
+        meta = data.get('metadata') or {}
+        meta_params = meta.get('params') or []
+
+        return await self._async_run_stage("config", len(meta_params), DabPumpsCoordinatorCore._build_device_config, device, data)
+
 
+    @staticmethod
+    def _build_device_config(device, data):
+        """
+        Build the config for a device from the configuration data.
+        Pure transformation that is safe to run in the executor.
+        """
         conf_id = data.get('configuration_id', '')
         conf_name = data.get('name') or f"config{conf_id}"
         conf_label = data.get('label') or f"config{conf_id}"
@@ -773,21 +1348,39 @@ class DabPumpsCoordinator(DataUpdateCoordinator):
             description = conf_descr,
             meta_params = conf_params
         )
-        config_map[conf_id] = config
         
         _LOGGER.debug(f"DAB Pumps configuration found: {conf_name} with {len(conf_params)} metadata params")        
-
-        # Merge with configurations from other devices
-        self._config_map_ts = datetime.now()
-        self._config_map.update(config_map)
+        return config
 
 
     async def _async_process_device_status_data(self, device, data, expired_values=False):
         """
         Process status data for a device
         """
-        status_map = {}
         status = data.get('status') or "{}"
+
+        status_map = await self._async_run_stage("status", status.count(","), DabPumpsCoordinatorCore._build_device_status_map, device, status, expired_values)
+
+        # Simulated devices report the values of the original device; let them drift apart
+        if SIMULATE_STATUS_CHURN > 0 and not expired_values and DabPumpsSimulate.is_simulated(device.serial):
+            config = self._config_map.get(device.config_id)
+            if config:
+                status_map = DabPumpsSimulate.churn(status_map, config.meta_params, SIMULATE_STATUS_CHURN, self._simulate_rnd)
+
+        _LOGGER.debug(f"DAB Pumps statusses found for '{device.name}' with {len(status_map)} values")        
+        
+        # Merge with statusses from other devices
+        self._status_map_ts = datetime.now()
+        self._status_map.update(status_map)
+
+
+    @staticmethod
+    def _build_device_status_map(device, status, expired_values):
+        """
+        Build the statusses for a device from the json encoded status string.
+        Pure transformation that is safe to run in the executor.
+        """
+        status_map = {}
         values = json.loads(status)
         
         for item_key, item_val in values.items():
@@ -803,8 +1396,8 @@ class DabPumpsCoordinator(DataUpdateCoordinator):
             
             # Item Entity ID is combination of device serial and each field unique name as internal sensor hash
             # Item Unique ID is a more readable version
-            entity_id = DabPumpsCoordinator.create_id(device.serial, item_key)
-            unique_id = DabPumpsCoordinator.create_id(device.name, item_key)
+            entity_id = DabPumpsCoordinatorCore.create_id(device.serial, item_key)
+            unique_id = DabPumpsCoordinatorCore.create_id(device.name, item_key)
 
             # Add it to our statusses
             item = DabPumpsStatus(
@@ -815,26 +1408,60 @@ class DabPumpsCoordinator(DataUpdateCoordinator):
             )
             status_map[entity_id] = item
 
-        _LOGGER.debug(f"DAB Pumps statusses found for '{device.name}' with {len(status_map)} values")        
-        
-        # Merge with statusses from other devices
-        self._status_map_ts = datetime.now()
-        self._status_map.update(status_map)
+        return status_map
 
 
-    async def _async_process_strings_data(self, data):
+    async def _async_build_string_map(self, data):
         """
-        Get translated strings from data
+        Get translated strings from data; returns the language and the string map
         """
         language = data.get('bundle', DEFAULT_LANGUAGE)
         messages = data.get('messages', {})
-        string_map = { k: v for k, v in messages.items() }
-        
-        _LOGGER.debug(f"DAB Pumps strings found: {len(string_map)} in language '{language}'")
-        
-        self._string_map_ts = datetime.now() if len(string_map) > 0 else datetime.min
-        self._string_map_lang = language
-        self._string_map = string_map
+
+        string_map = await self._async_run_stage("strings", len(messages), dict, messages)
+        return (language, string_map)
+
+
+    def _get_string_keys(self):
+        """
+        Strings used by the entities: the param keys and the labels of their values from the device configurations,
+        and the current values of label statusses
+        """
+        keys = set()
+        label_keys = set()
+        for config in self._config_map.values():
+            for params in config.meta_params.values():
+                keys.add(params.key)
+                if params.values:
+                    keys.update(params.values.values())
+                if params.type == 'label':
+                    label_keys.add(params.key)
+
+        keys.update(str(status.val) for status in self._status_map.values() if status.key in label_keys and status.val is not None)
+        return keys
+
+
+    @staticmethod
+    def _build_trimmed_string_map(string_map, keys):
+        """
+        Keep only the translations of the given strings.
+        Pure transformation that is safe to run in the executor.
+        """
+        return { k: v for k, v in string_map.items() if k in keys }
+
+
+    async def _async_run_stage(self, stage, size, func, *args):
+        """
+        Run a pure transformation step of the given size (number of items).
+        Large steps are run in the executor so they do not block the event loop, small ones directly.
+        Either way, the time the event loop was blocked is recorded for the stage.
+        """
+        if EXECUTOR_OFFLOAD and self._host and size >= EXECUTOR_MIN_ITEMS:
+            self._loop_timer.add(stage, 0.0, offloaded=True)
+            return await self._host.async_add_executor_job(func, *args)
+
+        with self._loop_timer.measure(stage):
+            return func(*args)
 
 
     async def _async_update_cache(self, context, data):
@@ -843,34 +1470,39 @@ class DabPumpsCoordinator(DataUpdateCoordinator):
             if not self._store:
                 return
             
-            # Retrieve cache file contents
-            store = await self._store.async_get_data() or {}
-            cache = store.get("cache", {})
-
-            data_old = cache.get(context, {})
-
             # We only update the cached contents once a day to prevent too many writes of unchanged data
-            ts_str = data_old.get("ts", "")
-            ts_old = datetime.fromisoformat(ts_str) if ts_str else datetime.min
-            ts_new = datetime.now()
+            def _is_expired(store, ts_new):
+                data_old = store.get("cache", {}).get(context, {})
+                ts_str = data_old.get("ts", "")
+                ts_old = datetime.fromisoformat(ts_str) if ts_str else datetime.min
+                return (ts_new - ts_old).total_seconds() >= 86400-300   # 1 day minus 5 minutes
 
-            if (ts_new - ts_old).total_seconds() < 86400-300:   # 1 day minus 5 minutes
-                # Not expired yet
+            store = await self._store.async_get_data() or {}
+            if not _is_expired(store, datetime.now()):
                 return
 
             _LOGGER.debug(f"Update cache: {context}")
         
-            # Update and write new cache file contents
-            cache[context] = { "ts": ts_new } | data
-            
-            store["cache"] = cache
-            await self._store.async_set_data(store)
+            # The (possibly large) data is compressed outside of the event loop, before the cache file is locked
+            data = await self._host.async_add_executor_job(DabPumpsStoreCodec.encode, data)
+
+            def _update(store):
+                ts_new = datetime.now()
+                if not _is_expired(store, ts_new):
+                    # Updated by another worker meanwhile
+                    return None
+
+                store.setdefault("cache", {})[context] = { "ts": ts_new } | data
+                return store
+
+            await self._store.async_update(_update)
 
         # Create the worker task to update diagnostics in the background,
         # but do not let main loop wait for it to finish
-        if self._hass:
-            data["ts"] = datetime.now()
-            self._hass.async_create_task(_async_worker(self, context, data))
+        # The data is shared with the api diagnostics, so add the timestamp to a copy
+        if self._host:
+            data = data | { "ts": datetime.now() }
+            self._host.async_create_task(_async_worker(self, context, data))
 
     
     async def _async_fetch_from_cache(self, context):
@@ -881,7 +1513,9 @@ class DabPumpsCoordinator(DataUpdateCoordinator):
         
         store = await self._store.async_get_data() or {}
         cache = store.get("cache", {})
-        data = cache.get(context, {})
+        data = DabPumpsStoreCodec.decode(cache.get(context, {}))
+        if data:
+            self._cache_fallbacks += 1
 
         return data
 
@@ -900,12 +1534,21 @@ class DabPumpsCoordinator(DataUpdateCoordinator):
         retries_percent = { idx: round(100.0 * n / calls_total, 2) for idx, n in enumerate(self._retries_needed) }
             
         api_data = await self._api.async_get_diagnostics()
+        with self._loop_timer.measure("redact"):
+            api_data = async_redact_data(api_data, DIAGNOSTICS_REDACT)
 
         return {
             "diagnostics_ts": datetime.now(),
             "diagnostics": {
                 "retries_counter": retries_counter,
                 "retries_percent": retries_percent,
+                "cache_fallbacks": self._cache_fallbacks,
+                "errors": self._error_counts,
+                "suppressed_requests": self.suppressed_requests,
+                "strings_registry": DabPumpsStringsRegistry.as_dict(),
+                "config_registry": DabPumpsConfigRegistry.as_dict(),
+                "loop_blocked": self._loop_timer.as_dict(),
+                "metrics": { k: v.val for k,v in self.metric_map.items() },
             },
             "data": {
                 "install_id": self._install_id,
@@ -917,13 +1560,15 @@ class DabPumpsCoordinator(DataUpdateCoordinator):
                 "config_map": config_map,
                 "status_map_ts": self._status_map_ts,
                 "status_map": status_map,
+                "device_status_ts": self._device_status_ts,
                 "string_map_ts": self._string_map_ts,
                 "string_map_lang": self._string_map_lang,
                 "string_map": self._string_map,
+                "string_misses": list(self._string_misses),
                 "user_role_ts": self._user_role_ts,
                 "user_role": self._user_role
             },
-            "api": async_redact_data(api_data, DIAGNOSTICS_REDACT),
+            "api": api_data,
         },
     
     
@@ -935,26 +1580,123 @@ class DabPumpsCoordinator(DataUpdateCoordinator):
         return str        
 
 
+class DabPumpsCoordinator(DabPumpsCoordinatorCore, DataUpdateCoordinator):
+    """My custom coordinator."""
+    
+    def __init__(self, hass, api, install_id, options, scheduler=None):
+        """Initialize my coordinator."""
+        DataUpdateCoordinator.__init__(
+            self,
+            hass,
+            _LOGGER,
+            # Name of the data. For logging purposes.
+            name=NAME,
+            # Polling interval. Will only be polled if there are subscribers.
+            update_interval=timedelta(seconds=options.get(CONF_POLLING_INTERVAL, DEFAULT_POLLING_INTERVAL)),
+            update_method=self._async_update_data,
+        )
+        DabPumpsCoordinatorCore.__init__(self, DabPumpsHassHost(hass), api, install_id, options, scheduler)
+
+
+    def _set_poll_interval(self, interval):
+        """Apply the interval to the timer that schedules the next refresh"""
+        super()._set_poll_interval(interval)
+        self.update_interval = timedelta(seconds=interval)
+
+
+    async def async_apply_options(self, options):
+        """Apply changed options while running, and let the entities pick up new translations"""
+        if not await super().async_apply_options(options):
+            return False
+
+        # Refresh now; this also restarts the timer with the new interval
+        await self.async_request_refresh()
+        return True
+
+
+    async def _async_update_data(self):
+        """
+        Fetch sensor data from API.
+        
+        This is the place to pre-process the data to lookup tables
+        so entities can quickly look up their data.
+        """
+        _LOGGER.debug(f"Update data")
+
+        try:
+            # Note: asyncio.TimeoutError and aiohttp.ClientError are already
+            # handled by the data update coordinator.
+            async with async_timeout.timeout(60):
+                if self._scheduler:
+                    # Poll together with the other installations of this account
+                    await self._scheduler.async_poll(self)
+                else:
+                    # Start measuring how long this poll blocks the event loop; ends after dispatch to the entities
+                    self._async_begin_poll()
+                    await self._async_detect_data()
+                
+                #_LOGGER.debug(f"device_map: {self._device_map}")
+                #_LOGGER.debug(f"config_map: {self._config_map}")
+                #_LOGGER.debug(f"status_map: {self._status_map}")
+                return (self._device_map, self._config_map, self._status_map)
+        
+        except asyncio.TimeoutError as err:
+            raise UpdateFailed(f"Timeout while communicating with API: {err}")
+
+
+    @callback
+    def _async_poll_pushed(self):
+        """Called by the scheduler when polled as part of a cycle started by another coordinator; dispatches to the entities"""
+        self.async_set_updated_data((self._device_map, self._config_map, self._status_map))
+    
+    
+    @callback
+    def async_update_listeners(self) -> None:
+        """Update all registered listeners, measuring how long the dispatch to the entities blocks the event loop"""
+        with self._loop_timer.measure("dispatch"):
+            super().async_update_listeners()
+
+        self._async_end_poll()
+
+
 class DabPumpsDataError(Exception):
     """Exception to indicate generic data failure."""    
 
 
-class DabPumpsCoordinatorStore(Store[dict]):
+class DabPumpsSuppressedError(DabPumpsApiRightsError):
+    """Exception to indicate a request was skipped because it is known to be forbidden."""
+
+
+class DabPumpsCoordinatorStore:
     
     _STORAGE_VERSION_MAJOR = 1
     _STORAGE_VERSION_MINOR = 0
     _STORAGE_KEY = DOMAIN + ".coordinator"
+
+    # The coordinators of all installations share one file; their updates are serialized so none get lost.
+    # One lock per event loop, as benchmarks run several Home Assistant instances one after the other
+    _locks = weakref.WeakKeyDictionary()
     
-    def __init__(self, hass, store_key):
-        super().__init__(
-            hass, 
+    def __init__(self, host, store_key):
+        self._store = host.create_store(
             key=self._STORAGE_KEY, 
             version=self._STORAGE_VERSION_MAJOR, 
-            minor_version=self._STORAGE_VERSION_MINOR
+            minor_version=self._STORAGE_VERSION_MINOR,
+            migrate_func=self._async_migrate_func,
         )
         self._store_key = store_key
 
     
+    @classmethod
+    def _get_lock(cls):
+        loop = asyncio.get_running_loop()
+        lock = cls._locks.get(loop)
+        if not lock:
+            lock = asyncio.Lock()
+            cls._locks[loop] = lock
+        return lock
+
+    
     async def _async_migrate_func(self, old_major_version, old_minor_version, old_data):
         """Migrate the history store data"""
 
@@ -967,14 +1709,27 @@ class DabPumpsCoordinatorStore(Store[dict]):
 
     async def async_get_data(self):
         """Load the persisted coordinator_cache file and return the data specific for this coordinator instance"""
-        data = await super().async_load() or {}
+        data = await self._store.async_load() or {}
         data_self = data.get(self._store_key, {})
         return data_self
     
 
     async def async_set_data(self, data_self):
         """Save the data specific for this coordinator instance into the persisted coordinator_cache file"""
-        data = await super().async_load() or {}
-        data[self._store_key] = data_self
-        await super().async_save(data)
+        await self.async_update(lambda _: data_self)
+
+
+    async def async_update(self, update_func):
+        """
+        Change the data specific for this coordinator instance via update_func(data), which returns the changed data
+        or None to leave it as is. Updates of all coordinators are serialized
+        """
+        async with self._get_lock():
+            data = await self._store.async_load() or {}
+            data_self = update_func(data.get(self._store_key, {}))
+            if data_self is None:
+                return
+
+            data[self._store_key] = data_self
+            await self._store.async_save(data)
     
\ No newline at end of file
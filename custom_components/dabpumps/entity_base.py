@@ -76,6 +76,15 @@ _LOGGER = logging.getLogger(__name__)
 
 class DabPumpsEntityHelperFactory:
     
+    @staticmethod
+    def remove(hass: HomeAssistant, config_entry: ConfigEntry):
+        """
+        Remove the helper of a config entry that is unloaded
+        """
+        install_id = config_entry.data[CONF_INSTALL_ID]
+        hass.data[DOMAIN].get(HELPER, {}).pop(install_id, None)
+
+
     @staticmethod
     def create(hass: HomeAssistant, config_entry: ConfigEntry):
         """
@@ -184,6 +193,23 @@ class DabPumpsEntityHelper:
             async_add_entities(entities)
     
     
+    async def async_setup_metrics(self, target_class, async_add_entities: AddEntitiesCallback):
+        """
+        Setting up the adding of diagnostic sensor entities for the coordinator performance metrics.
+        These are attached to the installation and are disabled by default.
+        """
+        entities = []
+        for key, metric in self.coordinator.metric_map.items():
+            try:
+                entities.append( target_class(self.coordinator, self.install_id, self.install_name, metric) )
+            except Exception as  ex:
+                _LOGGER.warning(f"Could not instantiate metric entity class for {key}. Details: {ex}")
+
+        _LOGGER.info(f"Add {len(entities)} metric entities for installation '{self.install_name}'")
+        if entities:
+            async_add_entities(entities)
+
+
     def _is_entity_whitelisted(self, params):
         """
         Determine whether an entry is whitelisted and should be added as sensor/binary sensor/number/select/switch
@@ -289,11 +315,21 @@ class DabPumpsEntity(Entity):
         self._coordinator = coordinator
         self._params = params
         self._attr_unit = self._convert_to_unit()
+        self._string_map_lang = coordinator.string_map_lang
+
+
+    def _is_string_map_changed(self):
+        """True once after the coordinator swapped its translations, i.e. after the language option was changed"""
+        if self._string_map_lang == self._coordinator.string_map_lang:
+            return False
+        
+        self._string_map_lang = self._coordinator.string_map_lang
+        return True
 
 
-    def _get_string(self, str):
+    def _get_string(self, str, resolve=True):
         # return 'translated' string or original string if not found
-        return self._coordinator.string_map.get(str, str)
+        return self._coordinator.get_string(str, resolve)
 
 
     def _convert_to_unit(self):
@@ -0,0 +1,125 @@
+"""faults.py: Inject latency and faults into the requests of the DabPumps API, to size timeouts and retries."""
+
+import asyncio
+import httpx
+import jwt
+import logging
+import random
+import time
+
+from collections import defaultdict, namedtuple
+
+from homeassistant.helpers.json import json_bytes
+from homeassistant.util.json import json_loads
+
+from .metrics import (
+    DabPumpsRequestStats,
+)
+
+
+_LOGGER = logging.getLogger(__name__)
+
+
+# Probabilities (0.0 - 1.0) of each fault for one request, plus its latency distribution:
+#   latency:        None, ('fixed', s), ('uniform', min_s, max_s) or ('lognormal', median_s, sigma)
+#   http_error:     respond with a 503 Service Unavailable
+#   res_error:      respond with a json body holding res: ERROR
+#   forbidden:      respond with a json body holding res: ERROR, code: FORBIDDEN
+#   expired_token:  hand out an already expired token on login, or reject the token of any other request
+#   timeout:        raise a timeout after the latency has passed
+DabPumpsFault = namedtuple(
+    'DabPumpsFault',
+    'latency, http_error, res_error, forbidden, expired_token, timeout',
+    defaults=(None, 0.0, 0.0, 0.0, 0.0, 0.0)
+)
+
+
+class DabPumpsFaultInjector:
+    """
+    Wraps the sending of requests by DabPumpsApi, injecting latency and faults per context.
+    Faults are looked up by exact context (i.e. 'statusses ABC123'), then by category (i.e. 'statusses'), then by '*'.
+    """
+
+    def __init__(self, faults: dict[str, DabPumpsFault], seed=0):
+        self._faults = faults
+        self._rnd = random.Random(seed)
+        self._injected = defaultdict(int)
+
+
+    @property
+    def injected(self):
+        """Number of injected faults per kind"""
+        return dict(self._injected)
+
+
+    def get_fault(self, context):
+        return self._faults.get(context) or self._faults.get(DabPumpsRequestStats.category(context)) or self._faults.get('*')
+
+
+    async def async_send(self, context, request, send):
+        """Send the request via the given send function, unless a fault is injected instead"""
+        fault = self.get_fault(context)
+        if not fault:
+            return await send(request)
+
+        if fault.latency:
+            await asyncio.sleep(self._sample_latency(fault.latency))
+
+        if self._roll("timeout", fault.timeout):
+            raise httpx.ReadTimeout(f"Injected timeout for {context}", request=request)
+
+        if self._roll("http_error", fault.http_error):
+            return httpx.Response(503, text="Service Unavailable", request=request)
+
+        if self._roll("forbidden", fault.forbidden):
+            return self._json_response(request, { "res": "ERROR", "code": "FORBIDDEN", "msg": "Forbidden operation", "where": "ROUTE RULE" })
+
+        if self._roll("res_error", fault.res_error):
+            return self._json_response(request, { "res": "ERROR", "code": "INTERNAL_ERROR", "msg": "Injected error" })
+
+        if self._roll("expired_token", fault.expired_token):
+            if DabPumpsRequestStats.category(context) != 'login':
+                # The server no longer accepts the token of the current session
+                return self._json_response(request, { "res": "ERROR", "code": "FORBIDDEN", "msg": "Token expired", "where": "ROUTE RULE" })
+
+            # Hand out a token that has already expired
+            response = await send(request)
+            return self._expire_token(request, response)
+
+        return await send(request)
+
+
+    def _roll(self, kind, probability):
+        if probability and self._rnd.random() < probability:
+            self._injected[kind] += 1
+            return True
+        return False
+
+
+    def _sample_latency(self, latency):
+        match latency:
+            case ('fixed', seconds):
+                return seconds
+            case ('uniform', lo, hi):
+                return self._rnd.uniform(lo, hi)
+            case ('lognormal', median, sigma):
+                return self._rnd.lognormvariate(0.0, sigma) * median
+            case _:
+                raise ValueError(f"Unknown latency distribution {latency}")
+
+
+    def _json_response(self, request, data):
+        return httpx.Response(200, content=json_bytes(data), headers={ "content-type": "application/json;charset=UTF-8" }, request=request)
+
+
+    def _expire_token(self, request, response):
+        try:
+            data = json_loads(response.content)
+        except ValueError:
+            return response
+
+        if not isinstance(data, dict) or not data.get('access_token'):
+            return response
+
+        data['access_token'] = jwt.encode({ "exp": int(time.time()) - 60 }, key=None, algorithm="none")
+        return self._json_response(request, data)
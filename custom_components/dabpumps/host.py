@@ -0,0 +1,241 @@
+"""host.py: The environment DabPumpsApi and the coordinator logic run in; Home Assistant or a standalone asyncio program."""
+
+import asyncio
+import httpx
+import json
+import logging
+import os
+
+from datetime import datetime
+
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers.httpx_client import create_async_httpx_client
+from homeassistant.helpers.storage import Store
+
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class DabPumpsHost:
+    """
+    Interface to the services the api and coordinator logic need from their environment:
+    http clients, persisted storage, executor jobs and background tasks.
+    """
+
+    @staticmethod
+    def of(hass_or_host):
+        """Return the given host, or wrap a HomeAssistant instance into one"""
+        if isinstance(hass_or_host, DabPumpsHost):
+            return hass_or_host
+        return DabPumpsHassHost(hass_or_host)
+
+
+    @property
+    def loop(self) -> asyncio.AbstractEventLoop:
+        raise NotImplementedError()
+
+
+    @property
+    def language(self):
+        """System language, i.e. 'en' or 'en-GB'"""
+        raise NotImplementedError()
+
+
+    def path(self, *args):
+        """Path of a file within the configuration directory"""
+        raise NotImplementedError()
+
+
+    def create_client(self, **kwargs) -> httpx.AsyncClient:
+        raise NotImplementedError()
+
+
+    def create_store(self, key, version, minor_version, migrate_func):
+        """
+        Create a store persisting json data under the given key;
+        returns an object with async_load() and async_save(data)
+        """
+        raise NotImplementedError()
+
+
+    async def async_add_executor_job(self, func, *args):
+        raise NotImplementedError()
+
+
+    def async_create_task(self, coro):
+        raise NotImplementedError()
+
+
+class DabPumpsHassHost(DabPumpsHost):
+    """Host services provided by Home Assistant"""
+
+    def __init__(self, hass: HomeAssistant):
+        self._hass = hass
+
+
+    @property
+    def hass(self):
+        return self._hass
+
+
+    @property
+    def loop(self):
+        return self._hass.loop
+
+
+    @property
+    def language(self):
+        return self._hass.config.language
+
+
+    def path(self, *args):
+        return self._hass.config.path(*args)
+
+
+    def create_client(self, **kwargs):
+        return create_async_httpx_client(self._hass, **kwargs)
+
+
+    def create_store(self, key, version, minor_version, migrate_func):
+        return DabPumpsHassStore(self._hass, key, version, minor_version, migrate_func)
+
+
+    async def async_add_executor_job(self, func, *args):
+        return await self._hass.async_add_executor_job(func, *args)
+
+
+    def async_create_task(self, coro):
+        return self._hass.async_create_task(coro)
+
+
+class DabPumpsHassStore(Store[dict]):
+    """Home Assistant Store that delegates migration of older data to the owner of the store"""
+
+    def __init__(self, hass, key, version, minor_version, migrate_func):
+        super().__init__(hass, key=key, version=version, minor_version=minor_version)
+        self._migrate_func = migrate_func
+
+
+    async def _async_migrate_func(self, old_major_version, old_minor_version, old_data):
+        return await self._migrate_func(old_major_version, old_minor_version, old_data)
+
+
+class DabPumpsStandaloneHost(DabPumpsHost):
+    """
+    Host services for running outside of Home Assistant, on a plain asyncio event loop.
+    Stores are written as json files in '<config_dir>/.storage', in the same format Home Assistant uses.
+    """
+
+    def __init__(self, config_dir, language="en"):
+        self._config_dir = config_dir
+        self._language = language
+        self._loop = asyncio.get_running_loop()
+        self._tasks = set()
+
+
+    @property
+    def loop(self):
+        return self._loop
+
+
+    @property
+    def language(self):
+        return self._language
+
+
+    def path(self, *args):
+        return os.path.join(self._config_dir, *args)
+
+
+    def create_client(self, **kwargs):
+        return httpx.AsyncClient(**kwargs)
+
+
+    def create_store(self, key, version, minor_version, migrate_func):
+        return DabPumpsFileStore(self, key, version, minor_version, migrate_func)
+
+
+    async def async_add_executor_job(self, func, *args):
+        return await self._loop.run_in_executor(None, func, *args)
+
+
+    def async_create_task(self, coro):
+        # Keep a reference to background tasks until done, so they are not garbage collected halfway
+        task = self._loop.create_task(coro)
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return task
+
+
+    async def async_block_till_done(self):
+        """Wait until all background tasks (i.e. store writes) have finished"""
+        while self._tasks:
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+
+
+class DabPumpsFileStore:
+    """Json file store, compatible with the files of a Home Assistant Store"""
+
+    def __init__(self, host, key, version, minor_version, migrate_func):
+        self._host = host
+        self._key = key
+        self._version = version
+        self._minor_version = minor_version
+        self._migrate_func = migrate_func
+        self._path = host.path(".storage", key)
+        self._lock = asyncio.Lock()
+
+
+    async def async_load(self):
+        # Like a Home Assistant Store, always return the data as it was written to file (i.e. timestamps as strings)
+        async with self._lock:
+            return await self._async_read()
+
+
+    async def async_save(self, data):
+        async with self._lock:
+            content = {
+                "version": self._version,
+                "minor_version": self._minor_version,
+                "key": self._key,
+                "data": data,
+            }
+            # Serialize on the event loop, so the data cannot be changed while it is being written
+            await self._host.async_add_executor_job(self._write, json.dumps(content, default=_json_default))
+
+
+    async def _async_read(self):
+        content = await self._host.async_add_executor_job(self._read)
+        if content is None:
+            return None
+
+        data = content.get("data")
+        version = content.get("version", 1)
+        minor_version = content.get("minor_version", 1)
+        if (version, minor_version) != (self._version, self._minor_version):
+            data = await self._migrate_func(version, minor_version, data)
+        return data
+
+
+    def _read(self):
+        try:
+            with open(self._path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+
+
+    def _write(self, text):
+        os.makedirs(os.path.dirname(self._path), exist_ok=True)
+        tmp_path = self._path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(text)
+        os.replace(tmp_path, self._path)
+
+
+def _json_default(obj):
+    if isinstance(obj, datetime):
+        return obj.isoformat()
+    if isinstance(obj, (set, tuple)):
+        return list(obj)
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
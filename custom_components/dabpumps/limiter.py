@@ -0,0 +1,136 @@
+"""limiter.py: Per-account rate limiting and prioritization of the requests to DAB Pumps."""
+
+import asyncio
+import heapq
+import itertools
+import logging
+import time
+
+from .metrics import (
+    DabPumpsLatencyHistogram,
+)
+
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class DabPumpsRequestLimiter:
+    """
+    Token bucket that limits the rate of requests of one account, with a priority queue for the requests
+    that have to wait for a token. A lower priority number goes first; equal priorities go first come, first served.
+
+    rate:   tokens added per second; 0 or less disables limiting
+    burst:  maximum number of tokens, i.e. requests that can be done at once after a quiet period
+    """
+
+    def __init__(self, rate, burst):
+        self._rate = rate
+        self._burst = max(1, burst)
+        self._tokens = float(self._burst)
+        self._updated = time.monotonic()
+
+        self._queue = []
+        self._seq = itertools.count()
+        self._timer = None
+
+        self._max_depth = 0
+        self._waits = {}
+
+
+    @property
+    def depth(self):
+        """Number of requests waiting for a token"""
+        return sum(1 for _, _, future in self._queue if not future.done())
+
+
+    @property
+    def max_depth(self):
+        return self._max_depth
+
+
+    async def async_acquire(self, priority, name=None):
+        """Wait for a token; the time waited is recorded under the given name (defaults to the priority)"""
+        start = time.monotonic()
+        await self._async_acquire(priority)
+        self._record_wait(name if name is not None else priority, time.monotonic() - start)
+
+
+    async def _async_acquire(self, priority):
+        if self._rate <= 0:
+            return
+
+        self._refill()
+        if not self._queue and self._tokens >= 1:
+            self._tokens -= 1
+            return
+
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._queue, (priority, next(self._seq), future))
+        self._max_depth = max(self._max_depth, self.depth)
+        self._schedule()
+
+        try:
+            await future
+        except asyncio.CancelledError:
+            # Hand a token that was already granted to us on to the next waiter
+            if future.done() and not future.cancelled():
+                self._tokens += 1
+                self._dispatch()
+            raise
+
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self._burst, self._tokens + (now - self._updated) * self._rate)
+        self._updated = now
+
+
+    def _dispatch(self):
+        self._timer = None
+        self._refill()
+
+        while self._queue and self._tokens >= 1:
+            (_, _, future) = heapq.heappop(self._queue)
+            if future.done():
+                # Waiter was cancelled (i.e. timed out)
+                continue
+            self._tokens -= 1
+            future.set_result(None)
+
+        self._schedule()
+
+
+    def _schedule(self):
+        # Drop cancelled waiters at the head of the queue
+        while self._queue and self._queue[0][2].done():
+            heapq.heappop(self._queue)
+
+        if not self._queue or self._timer:
+            return
+
+        delay = max(0.0, (1 - self._tokens) / self._rate)
+        self._timer = asyncio.get_running_loop().call_later(delay, self._dispatch)
+
+
+    def _record_wait(self, name, seconds):
+        histogram = self._waits.get(name)
+        if not histogram:
+            histogram = DabPumpsLatencyHistogram()
+            self._waits[name] = histogram
+        histogram.add(1000.0 * seconds)
+
+
+    def get_wait(self, name):
+        """Wait time statistics for requests recorded under the given name, or None if there were none yet"""
+        histogram = self._waits.get(name)
+        return histogram.as_dict() if histogram else None
+
+
+    def as_dict(self):
+        return {
+            "rate": self._rate,
+            "burst": self._burst,
+            "depth": self.depth,
+            "max_depth": self._max_depth,
+            "wait": { name: histogram.as_dict() for name, histogram in self._waits.items() },
+        }
@@ -0,0 +1,228 @@
+"""metrics.py: In-memory performance metrics for DAB Pumps integration."""
+
+import contextvars
+import logging
+import math
+import time
+
+from contextlib import contextmanager
+
+
+_LOGGER = logging.getLogger(__name__)
+
+# Kind of metric, named after the Home Assistant sensor state classes.
+# A gauge goes up and down; a counter only increases until it is reset by a restart.
+METRIC_GAUGE = "measurement"
+METRIC_COUNTER = "total_increasing"
+
+# Loop timer of the coordinator whose poll runs in the current task; see DabPumpsLoopTimer.bind
+_bound_timer = contextvars.ContextVar("dabpumps_loop_timer", default=None)
+
+
+class DabPumpsLoopTimer:
+    """
+    Keeps track of how long the event loop was blocked by synchronous work, per stage.
+    Work that was offloaded to the executor only counts as offloaded, as it did not block the loop.
+
+    Between poll_begin and poll_end the blocked time is also summed for the poll,
+    so polls that block the loop for too long can be flagged.
+
+    A timer shared by several coordinators (the one of the api) is created with forward=True;
+    it then also adds the time to the timer that was bound to the current task by the coordinator it works for.
+    """
+
+    def __init__(self, forward=False):
+        self._forward = forward
+        self._stages = {}
+        self._poll_stages = None
+        self._polls = { "count": 0, "stalled": 0, "last_ms": 0.0, "max_ms": 0.0, "last_stages": {} }
+
+
+    @contextmanager
+    def measure(self, stage):
+        """Measure the synchronous work done inside the with-block"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(stage, time.perf_counter() - start)
+
+
+    def add(self, stage, seconds, offloaded=False):
+        stats = self._stages.get(stage)
+        if not stats:
+            stats = { "count": 0, "offloaded": 0, "total_ms": 0.0, "max_ms": 0.0, "last_ms": 0.0 }
+            self._stages[stage] = stats
+
+        ms = 1000.0 * seconds
+        stats["count"] += 1
+        stats["offloaded"] += 1 if offloaded else 0
+        stats["total_ms"] += ms
+        stats["max_ms"] = max(stats["max_ms"], ms)
+        stats["last_ms"] = ms
+
+        if self._poll_stages is not None:
+            self._poll_stages[stage] = self._poll_stages.get(stage, 0.0) + ms
+
+        if self._forward:
+            timer = _bound_timer.get()
+            if timer is not None and timer is not self:
+                timer.add(stage, seconds, offloaded)
+
+
+    @staticmethod
+    def bind(timer):
+        """
+        Let shared timers forward the time measured in the current task, and in the tasks it creates, to the given timer.
+        Returns a token for unbind
+        """
+        return _bound_timer.set(timer)
+
+
+    @staticmethod
+    def unbind(token):
+        _bound_timer.reset(token)
+
+
+    def poll_begin(self):
+        self._poll_stages = {}
+
+
+    def poll_end(self, threshold_ms):
+        """
+        Close the poll in progress.
+        Returns the ms the loop was blocked during the poll and whether that exceeded the threshold.
+        """
+        if self._poll_stages is None:
+            return (0.0, False)
+
+        stages = self._poll_stages
+        self._poll_stages = None
+
+        poll_ms = sum(stages.values())
+        stalled = poll_ms >= threshold_ms
+
+        self._polls["count"] += 1
+        self._polls["stalled"] += 1 if stalled else 0
+        self._polls["last_ms"] = poll_ms
+        self._polls["max_ms"] = max(self._polls["max_ms"], poll_ms)
+        self._polls["last_stages"] = stages
+
+        return (poll_ms, stalled)
+
+
+    @property
+    def polls(self):
+        return self._polls
+
+
+    def as_dict(self):
+        return {
+            "stages": { stage: _round_values(stats) for stage, stats in self._stages.items() },
+            "polls": _round_values(self._polls | { "last_stages": _round_values(self._polls["last_stages"]) }),
+        }
+
+
+class DabPumpsLatencyHistogram:
+    """
+    Streaming latency histogram with logarithmic buckets.
+    Memory use is bounded by the number of buckets; percentiles are accurate to within one bucket (25%).
+    """
+
+    _BUCKET_FACTOR = 1.25
+
+    def __init__(self):
+        self._buckets = {}
+        self._count = 0
+        self._total_ms = 0.0
+        self._max_ms = 0.0
+
+
+    def add(self, ms):
+        idx = max(0, math.ceil(math.log(max(ms, 1.0), self._BUCKET_FACTOR)))
+        self._buckets[idx] = self._buckets.get(idx, 0) + 1
+        self._count += 1
+        self._total_ms += ms
+        self._max_ms = max(self._max_ms, ms)
+
+
+    def percentile(self, pct):
+        """Upper bound of the bucket holding the given percentile, capped at the max seen"""
+        if not self._count:
+            return None
+
+        rank = math.ceil(self._count * pct / 100.0)
+        seen = 0
+        for idx in sorted(self._buckets):
+            seen += self._buckets[idx]
+            if seen >= rank:
+                return min(self._BUCKET_FACTOR ** idx, self._max_ms)
+
+        return self._max_ms
+
+
+    def as_dict(self):
+        return {
+            "count": self._count,
+            "mean_ms": round(self._total_ms / self._count, 1) if self._count else None,
+            "p50_ms": _round(self.percentile(50)),
+            "p95_ms": _round(self.percentile(95)),
+            "p99_ms": _round(self.percentile(99)),
+            "max_ms": round(self._max_ms, 1),
+        }
+
+
+class DabPumpsRequestStats:
+    """
+    Keeps track of request latency, error rate and bytes transferred per context category
+    (login, statusses, configuration, set, localization, installation)
+    """
+
+    def __init__(self):
+        self._categories = {}
+
+
+    @staticmethod
+    def category(context):
+        """Category of a request context, i.e. 'statusses' for 'statusses {serial}' or 'localization' for 'localization_{lang}'"""
+        return context.split(' ', 1)[0].split('_', 1)[0]
+
+
+    def add(self, context, seconds, success, bytes_sent, bytes_received):
+        category = self.category(context)
+        stats = self._categories.get(category)
+        if not stats:
+            stats = { "latency": DabPumpsLatencyHistogram(), "errors": 0, "bytes_sent": 0, "bytes_received": 0 }
+            self._categories[category] = stats
+
+        stats["latency"].add(1000.0 * seconds)
+        stats["errors"] += 0 if success else 1
+        stats["bytes_sent"] += bytes_sent
+        stats["bytes_received"] += bytes_received
+
+
+    def get(self, category):
+        """Statistics for one category, or None if no requests were done for it yet"""
+        stats = self._categories.get(category)
+        if not stats:
+            return None
+
+        latency = stats["latency"].as_dict()
+        return latency | {
+            "errors": stats["errors"],
+            "error_rate": round(100.0 * stats["errors"] / latency["count"], 2),
+            "bytes_sent": stats["bytes_sent"],
+            "bytes_received": stats["bytes_received"],
+        }
+
+
+    def as_dict(self):
+        return { category: self.get(category) for category in self._categories }
+
+
+def _round(v):
+    return round(v, 1) if v is not None else None
+
+
+def _round_values(d):
+    return { k: round(v, 3) if isinstance(v, float) else v for k,v in d.items() }
@@ -0,0 +1,215 @@
+"""registry.py: Process-wide caches of DAB Pumps data that is identical across installations and accounts."""
+
+import asyncio
+import logging
+
+from datetime import datetime
+
+from .api import (
+    DabPumpsStoreCodec,
+)
+from .const import (
+    DOMAIN,
+    STRINGS_TRIM,
+)
+
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class DabPumpsRegistryEntry:
+    """One shared item, with the coordinators that use it"""
+
+    def __init__(self, key):
+        self.key = key
+        self.value = None
+        self.ts = datetime.min
+        self.owners = set()
+        self.lock = asyncio.Lock()
+
+
+class DabPumpsRegistry:
+    """
+    Items shared by all coordinators of all accounts, i.e. translations per language or configurations per config_id.
+    Each item is downloaded at most once a day and persisted once, no matter how many installations use it.
+    An item is dropped from memory when the last coordinator using it releases it; the persisted copy remains.
+    A registry that does not retain its items only remembers when they were downloaded.
+    """
+
+    _NAME = None
+    _STORAGE_KEY = None
+
+    # Whether the built item is held in memory for the other coordinators, or built by each from the persisted copy
+    _RETAIN = True
+
+    # Subclasses hold their own entries and store
+    _entries = None
+    _store = None
+
+    @classmethod
+    async def async_acquire(cls, host, key, owner, fetch_func, build_func):
+        """
+        Get the shared item for a key on behalf of a coordinator.
+        fetch_func() downloads the data and build_func(data) turns it into the item; the data is what gets persisted.
+        They are only called when the shared item has expired.
+        Falls back to the persisted copy if the download fails and the item is not held in memory yet.
+        """
+        entry = cls._entries.get(key)
+        if not entry:
+            entry = DabPumpsRegistryEntry(key)
+            cls._entries[key] = entry
+
+        entry.owners.add(id(owner))
+
+        async with entry.lock:
+            if (datetime.now() - entry.ts).total_seconds() < 86400:
+                # Fetched by another coordinator less than a day ago
+                if entry.value:
+                    return entry.value
+
+                # Not held in memory; build it from the copy that was persisted after the download
+                data = await cls.async_load(host, key)
+                if data:
+                    return await build_func(data)
+
+            try:
+                data = await fetch_func()
+                value = await build_func(data)
+                entry.ts = datetime.now()
+
+                if cls._RETAIN:
+                    cls._async_persist(host, key, data)
+                else:
+                    # Other coordinators build the item from the persisted copy, so it must be there before they look
+                    await cls._async_save(host, key, data)
+
+            except Exception:
+                if entry.value:
+                    # Ignore problems if this is just a refresh
+                    return entry.value
+
+                # Next, try from persisted copy if this is the initial retrieve
+                data = await cls.async_load(host, key)
+                if not data:
+                    raise
+
+                value = await build_func(data)
+                entry.ts = datetime.min
+
+            if cls._RETAIN:
+                entry.value = value
+            return value
+
+
+    @classmethod
+    def reset(cls):
+        """
+        Forget the items and stores of all registries, like at the start of a new process.
+        Used when one process runs several Home Assistant instances one after the other, i.e. in benchmarks
+        """
+        for registry in cls.__subclasses__():
+            registry._entries = {}
+            registry._store = None
+
+
+    @classmethod
+    def release(cls, key, owner):
+        """A coordinator no longer uses the shared item for a key"""
+        entry = cls._entries.get(key)
+        if not entry:
+            return
+
+        entry.owners.discard(id(owner))
+        if not entry.owners and not entry.lock.locked():
+            _LOGGER.debug(f"Drop {cls._NAME} '{key}'; no longer in use")
+            cls._entries.pop(key, None)
+
+
+    @classmethod
+    def as_dict(cls):
+        return {
+            key: { "ts": entry.ts, "owners": len(entry.owners) }
+            for key, entry in cls._entries.items()
+        }
+
+
+    @classmethod
+    def _get_store(cls, host):
+        if not cls._store:
+            cls._store = DabPumpsRegistryStore(host, cls._STORAGE_KEY)
+        return cls._store
+
+
+    @classmethod
+    async def async_load(cls, host, key):
+        """The persisted data for a key, or an empty dict if there is none"""
+        data = await cls._get_store(host).async_get_data()
+
+        # The (possibly large) data is decompressed outside of the event loop
+        return await host.async_add_executor_job(DabPumpsStoreCodec.decode, data.get(key, {}))
+
+
+    @classmethod
+    async def _async_save(cls, host, key, data):
+        # The (possibly large) data is compressed outside of the event loop
+        data = await host.async_add_executor_job(DabPumpsStoreCodec.encode, data)
+        await cls._get_store(host).async_update(key, data)
+
+
+    @classmethod
+    def _async_persist(cls, host, key, data):
+        # Create the worker task to update the store in the background,
+        # but do not let main loop wait for it to finish
+        host.async_create_task(cls._async_save(host, key, data))
+
+
+class DabPumpsStringsRegistry(DabPumpsRegistry):
+    """Translations per language"""
+
+    _NAME = "translations"
+    _STORAGE_KEY = DOMAIN + ".strings"
+    _RETAIN = not STRINGS_TRIM   # each coordinator keeps only the translations it uses
+    _entries = {}
+    _store = None
+
+
+class DabPumpsConfigRegistry(DabPumpsRegistry):
+    """Device configurations (metadata params) per config_id, i.e. Esybox or DConnect Box"""
+
+    _NAME = "configuration"
+    _STORAGE_KEY = DOMAIN + ".configurations"
+    _entries = {}
+    _store = None
+
+
+class DabPumpsRegistryStore:
+    """Persisted copy of a registry, one entry per key"""
+
+    _STORAGE_VERSION_MAJOR = 1
+    _STORAGE_VERSION_MINOR = 0
+
+    def __init__(self, host, store_key):
+        self._store = host.create_store(
+            key=store_key,
+            version=self._STORAGE_VERSION_MAJOR,
+            minor_version=self._STORAGE_VERSION_MINOR,
+            migrate_func=self._async_migrate_func,
+        )
+        self._lock = asyncio.Lock()
+
+
+    async def _async_migrate_func(self, old_major_version, old_minor_version, old_data):
+        """Migrate the registry store data"""
+        return old_data
+
+
+    async def async_get_data(self):
+        return await self._store.async_load() or {}
+
+
+    async def async_update(self, key, data_key):
+        """Replace the data of one key; updates of different keys are serialized so none get lost"""
+        async with self._lock:
+            data = await self._store.async_load() or {}
+            data[key] = data_key
+            await self._store.async_save(data)
@@ -0,0 +1,130 @@
+"""scheduler.py: Align the polls of all installations of one DAB Pumps account into one batched cycle."""
+
+import asyncio
+import logging
+
+from datetime import datetime
+
+from homeassistant.core import HomeAssistant
+
+from .api import (
+    DabPumpsApiFactory,
+)
+from .const import (
+    DOMAIN,
+    SCHEDULER,
+)
+
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class DabPumpsSchedulerFactory:
+
+    @staticmethod
+    def create(hass: HomeAssistant, username, password, api):
+        """
+        Get the scheduler for the coordinators that share the DabPumpsApi for given credentials
+        """
+        key = DabPumpsApiFactory.create_key(username, password)
+
+        if not SCHEDULER in hass.data[DOMAIN]:
+            hass.data[DOMAIN][SCHEDULER] = {}
+
+        scheduler = hass.data[DOMAIN][SCHEDULER].get(key, None)
+        if not scheduler:
+            scheduler = DabPumpsAccountScheduler(api)
+            hass.data[DOMAIN][SCHEDULER][key] = scheduler
+
+        return scheduler
+
+
+class DabPumpsAccountScheduler:
+    """
+    Runs the polls of all coordinators that share one DabPumpsApi as one cycle:
+    a single login, followed by the requests of all installations at once.
+
+    The first coordinator whose timer fires starts a cycle; coordinators whose timer fires while
+    the cycle runs join it. Coordinators that did not join get the data pushed when the cycle ends,
+    which restarts their timers so all coordinators of the account stay aligned.
+
+    A coordinator whose own interval has not elapsed yet, i.e. one that backed off with adaptive polling,
+    is left out of the cycle and keeps its own timer.
+    """
+
+    def __init__(self, api):
+        self._api = api
+        self._coordinators = []
+        self._cycle = None
+        self._joined = set()
+        self._cycles = 0
+
+
+    @property
+    def coordinators(self):
+        return self._coordinators
+
+
+    @property
+    def cycles(self):
+        return self._cycles
+
+
+    def register(self, coordinator):
+        if coordinator not in self._coordinators:
+            self._coordinators.append(coordinator)
+
+
+    def unregister(self, coordinator):
+        if coordinator in self._coordinators:
+            self._coordinators.remove(coordinator)
+
+
+    async def async_poll(self, coordinator):
+        """Poll as part of the current cycle, or start a new one. Returns True if the coordinator's data was refreshed"""
+        if self._cycle is None or self._cycle.done():
+            self._joined = set()
+            self._cycle = asyncio.get_running_loop().create_task(self._async_cycle(coordinator))
+
+        self._joined.add(coordinator)
+
+        # Shield the cycle, so a timeout of one coordinator does not cancel the polls of the others
+        results = await asyncio.shield(self._cycle)
+        if coordinator not in results:
+            # Registered after this cycle started, or not due when it started; poll on its own
+            coordinator._async_begin_poll()
+            return await coordinator._async_detect_data()
+
+        result = results[coordinator]
+        if isinstance(result, BaseException):
+            raise result
+        return result
+
+
+    async def _async_cycle(self, starter):
+        # The coordinator that starts the cycle is due; others only when their own interval is (nearly) over
+        now = datetime.now()
+        slack = starter.poll_interval / 2
+        coordinators = [ coordinator for coordinator in self._coordinators if coordinator is starter or coordinator.is_poll_due(now, slack) ]
+        self._cycles += 1
+
+        _LOGGER.debug(f"Poll cycle {self._cycles} for {len(coordinators)} installations")
+
+        # One login for all installations. A failure is retried by each of the coordinators
+        try:
+            await self._api.async_login()
+        except Exception as ex:
+            _LOGGER.debug(f"Login for poll cycle failed: {ex}")
+
+        for coordinator in coordinators:
+            coordinator._async_begin_poll()
+
+        results = await asyncio.gather(*[ coordinator._async_detect_data() for coordinator in coordinators ], return_exceptions=True)
+        results = dict(zip(coordinators, results))
+
+        # Hand the results to coordinators whose own timer did not fire during this cycle
+        for coordinator, result in results.items():
+            if coordinator not in self._joined and not isinstance(result, BaseException):
+                coordinator._async_poll_pushed()
+
+        return results
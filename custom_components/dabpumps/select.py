@@ -110,9 +110,13 @@ class DabPumpsSelect(CoordinatorEntity, SelectEntity, DabPumpsEntity):
         # find the correct device and status corresponding to this sensor
         status = status_map.get(self.object_id)
 
-        # Update any attributes
+        # Update any attributes; re-create translated names and labels after a change of language
         if status:
-            if self._update_attributes(status, False):
+            is_create = self._is_string_map_changed()
+            if is_create:
+                self._dict = { k: self._get_string(v) for k,v in self._params.values.items() }
+
+            if self._update_attributes(status, is_create):
                 self.async_write_ha_state()
     
     
@@ -31,12 +31,17 @@ from collections import namedtuple
 
 from .const import (
     DOMAIN,
+    NAME,
     COORDINATOR,
     CONF_INSTALL_ID,
     CONF_INSTALL_NAME,
     CONF_OPTIONS,
 )
 
+from .coordinator import (
+    DabPumpsCoordinator,
+)
+
 from .entity_base import (
     DabPumpsEntityHelperFactory,
     DabPumpsEntityHelper,
@@ -54,6 +59,7 @@ async def async_setup_entry(hass: HomeAssistant, config_entry: ConfigEntry, asyn
     """
     helper = DabPumpsEntityHelperFactory.create(hass, config_entry)
     await helper.async_setup_entry(Platform.SENSOR, DabPumpsSensor, async_add_entities)
+    await helper.async_setup_metrics(DabPumpsMetricSensor, async_add_entities)
 
 
 class DabPumpsSensor(CoordinatorEntity, SensorEntity, DabPumpsEntity):
@@ -110,9 +116,9 @@ class DabPumpsSensor(CoordinatorEntity, SensorEntity, DabPumpsEntity):
         # find the correct device and status corresponding to this sensor
         status = status_map.get(self.object_id)
 
-        # Update any attributes
+        # Update any attributes; re-create translated names after a change of language
         if status:
-            if self._update_attributes(status, False):
+            if self._update_attributes(status, self._is_string_map_changed()):
                 self.async_write_ha_state()
     
     
@@ -135,7 +141,7 @@ class DabPumpsSensor(CoordinatorEntity, SensorEntity, DabPumpsEntity):
             case 'enum':
                 # Lookup the dict string for the value and otherwise return the value itself
                 attr_precision = None
-                attr_val = self._get_string(self._params.values.get(status.val, status.val)) if status.val!=None else None
+                attr_val = self._get_string(self._params.values.get(status.val, status.val), status.val in self._params.values) if status.val!=None else None
                 attr_unit = None
 
             case 'label' | _:
@@ -185,3 +191,62 @@ class DabPumpsSensor(CoordinatorEntity, SensorEntity, DabPumpsEntity):
         
         return changed
     
+
+
+class DabPumpsMetricSensor(CoordinatorEntity, SensorEntity):
+    """
+    Representation of a DAB Pumps performance metric.
+    
+    Diagnostic sensor attached to the installation, reporting on the integration itself
+    instead of on a pump or communication module.
+    """
+    
+    def __init__(self, coordinator, install_id, install_name, metric) -> None:
+        """ Initialize the sensor. """
+        CoordinatorEntity.__init__(self, coordinator)
+        
+        # The unique identifier for this sensor within Home Assistant
+        self.object_id = DabPumpsCoordinator.create_id(install_name, metric.key)
+        self.entity_id = ENTITY_ID_FORMAT.format(self.object_id)
+        self.install_id = install_id
+        
+        self._coordinator = coordinator
+        self._key = metric.key
+
+        self._attr_unique_id = DabPumpsCoordinator.create_id(install_id, metric.key)
+        self._attr_has_entity_name = True
+        self._attr_name = metric.name
+        self._attr_entity_category = EntityCategory.DIAGNOSTIC
+        self._attr_entity_registry_enabled_default = False
+        self._attr_state_class = SensorStateClass(metric.state)
+        self._attr_native_unit_of_measurement = metric.unit
+        self._attr_icon = self._get_metric_icon(metric.unit)
+        self._attr_native_value = metric.val
+        self._attr_device_info = DeviceInfo(
+           identifiers = {(DOMAIN, install_id)},
+           name = install_name,
+           manufacturer = NAME,
+           model = "Installation",
+        )
+    
+    
+    @property
+    def suggested_object_id(self) -> str | None:
+        """Return input for object id."""
+        return self.object_id
+    
+    
+    def _get_metric_icon(self, unit):
+        match unit:
+            case 'ms':  return 'mdi:timer-sand'
+            case '%':   return 'mdi:percent'
+            case _:     return 'mdi:counter'
+    
+    
+    @callback
+    def _handle_coordinator_update(self) -> None:
+        """Handle updated data from the coordinator."""
+        metric = self._coordinator.metric_map.get(self._key)
+        if metric and self._attr_native_value != metric.val:
+            self._attr_native_value = metric.val
+            self.async_write_ha_state()
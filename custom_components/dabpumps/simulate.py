@@ -0,0 +1,89 @@
+"""simulate.py: Synthetic load mode to scale-test with many installations and devices."""
+
+import logging
+import random
+import re
+
+from .const import (
+    SIMULATE_SUFFIX_ID,
+    SIMULATE_SUFFIX_NAME,
+)
+
+
+_LOGGER = logging.getLogger(__name__)
+
+SIMULATE_SUFFIX_RE = re.compile(rf"(?:{re.escape(SIMULATE_SUFFIX_ID)}\d*)+$")
+
+
+class DabPumpsSimulate:
+    """
+    Helpers for simulated copies of installations and devices.
+    Copy 0 is the original, copy 1 gets suffix '_test' and copy n gets suffix '_test{n}'.
+    """
+
+    @staticmethod
+    def suffix_id(copy):
+        if copy == 0:
+            return ""
+        return SIMULATE_SUFFIX_ID if copy == 1 else f"{SIMULATE_SUFFIX_ID}{copy}"
+
+
+    @staticmethod
+    def suffix_name(copy):
+        if copy == 0:
+            return ""
+        return SIMULATE_SUFFIX_NAME if copy == 1 else SIMULATE_SUFFIX_NAME.replace(")", f" {copy})")
+
+
+    @staticmethod
+    def original_id(id):
+        """Id of the original installation or device serial, stripped from all simulation suffixes"""
+        return SIMULATE_SUFFIX_RE.sub("", id)
+
+
+    @staticmethod
+    def copy(id):
+        """Copy number of a simulated installation id or device serial; 0 for the original"""
+        match = re.search(rf"{re.escape(SIMULATE_SUFFIX_ID)}(\d*)$", id)
+        if not match:
+            return 0
+        return int(match.group(1) or 1)
+
+
+    @staticmethod
+    def is_simulated(id):
+        return SIMULATE_SUFFIX_RE.search(id) is not None
+
+
+    @staticmethod
+    def churn(status_map, meta_params, fraction, rnd: random.Random):
+        """
+        Randomly change the values of a fraction of the measurements in a status map,
+        a small step up or down within the min and max of the param.
+        Returns a new status map; enums and other values are left unchanged.
+        """
+        result = dict(status_map)
+        for entity_id, status in status_map.items():
+            params = meta_params.get(status.key)
+            if not params or params.type != 'measure' or status.val is None:
+                continue
+            if rnd.random() >= fraction:
+                continue
+
+            try:
+                val = int(status.val)
+                lo = int(float(params.min)) if params.min is not None else None
+                hi = int(float(params.max)) if params.max is not None else None
+            except (TypeError, ValueError):
+                continue
+
+            step = max(1, abs(val) // 20)
+            val += rnd.randint(-step, step)
+            if lo is not None:
+                val = max(val, lo)
+            if hi is not None:
+                val = min(val, hi)
+
+            result[entity_id] = status._replace(val=str(val))
+
+        return result
@@ -0,0 +1,143 @@
+"""
+standalone.py: Poll DAB Pumps installations outside of Home Assistant and emit the results as JSON lines.
+
+Runs the same DabPumpsApi and coordinator logic as the integration on a plain asyncio event loop,
+with its stores as json files in the given config dir. Useful to profile and load-test the poller.
+Only the homeassistant python package needs to be installed; no Home Assistant instance is started.
+
+Each poll of each installation emits one line:
+  {"ts": ..., "install_id": ..., "success": true, "poll_ms": 812.4, "devices": 2, "values": {serial: {key: val}}}
+
+Usage: DABPUMPS_PASSWORD=... python -m custom_components.dabpumps.standalone --username user@example.com [--install ID] [--polls N]
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import sys
+import time
+
+from datetime import datetime
+
+from homeassistant.const import CONF_LANGUAGE
+
+from .api import DabPumpsApi
+from .const import (
+    CONF_POLLING_INTERVAL,
+    CONF_POLLING_ADAPTIVE,
+    DEFAULT_POLLING_INTERVAL,
+)
+from .coordinator import DabPumpsCoordinatorCore
+from .host import DabPumpsStandaloneHost
+
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class DabPumpsStandalonePoller:
+    """Polls one or more installations of a DAB Pumps account at the (adaptive) polling interval"""
+
+    def __init__(self, host, api, install_ids, options, output=sys.stdout, values=True):
+        self._host = host
+        self._api = api
+        self._options = options
+        self._output = output
+        self._values = values
+        self._coordinators = [ DabPumpsCoordinatorCore(host, api, install_id, options) for install_id in install_ids ]
+
+
+    @staticmethod
+    async def async_detect_install_ids(host, api):
+        """Get the ids of all installations of the account"""
+        coordinator = DabPumpsCoordinatorCore(host, api, None, {})
+        install_map = await coordinator.async_config_flow_data()
+        return list(install_map.keys())
+
+
+    async def async_run(self, polls=None):
+        """Poll all installations until the given number of polls is reached, or forever"""
+        count = 0
+        while polls is None or count < polls:
+            start = time.monotonic()
+
+            # Installations that backed off with adaptive polling skip the polls until their own interval is (nearly) over
+            now = datetime.now()
+            slack = min(coordinator.poll_interval for coordinator in self._coordinators) / 2
+            coordinators = [ coordinator for coordinator in self._coordinators if coordinator.is_poll_due(now, slack) ]
+
+            await asyncio.gather(*[ self._async_poll(coordinator) for coordinator in coordinators ])
+            count += 1
+
+            if polls is None or count < polls:
+                # The installation that needs it soonest sets the pace
+                interval = min(coordinator.poll_interval for coordinator in self._coordinators)
+                await asyncio.sleep(max(0, interval - (time.monotonic() - start)))
+
+
+    async def _async_poll(self, coordinator):
+        start = time.perf_counter()
+        success = await coordinator.async_poll()
+        poll_ms = 1000.0 * (time.perf_counter() - start)
+
+        line = {
+            "ts": datetime.now().isoformat(),
+            "install_id": coordinator.install_id,
+            "success": success,
+            "poll_ms": round(poll_ms, 1),
+            "devices": len(coordinator.device_map),
+            "interval": coordinator.poll_interval,
+        }
+        if self._values:
+            values = {}
+            for status in coordinator.status_map.values():
+                values.setdefault(status.serial, {})[status.key] = status.val
+            line["values"] = values
+
+        self._output.write(json.dumps(line) + "\n")
+        self._output.flush()
+
+
+async def async_main(args):
+    password = args.password or os.environ.get("DABPUMPS_PASSWORD")
+    if not password:
+        raise SystemExit("Password required; pass --password or set DABPUMPS_PASSWORD")
+
+    host = DabPumpsStandaloneHost(args.config_dir, args.language)
+    api = DabPumpsApi(host, args.username, password, use_history_store=True)
+    options = { CONF_POLLING_INTERVAL: args.interval, CONF_POLLING_ADAPTIVE: args.adaptive, CONF_LANGUAGE: args.language }
+
+    try:
+        install_ids = args.install or await DabPumpsStandalonePoller.async_detect_install_ids(host, api)
+        if not install_ids:
+            raise SystemExit("No installations found for this account")
+
+        poller = DabPumpsStandalonePoller(host, api, install_ids, options, values=not args.no_values)
+        await poller.async_run(args.polls)
+
+    finally:
+        await api.async_logout()
+        await host.async_block_till_done()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--username", required=True)
+    parser.add_argument("--password", help="defaults to the DABPUMPS_PASSWORD environment variable")
+    parser.add_argument("--install", action="append", metavar="ID", help="installation id to poll (repeatable); default all")
+    parser.add_argument("--interval", type=int, default=DEFAULT_POLLING_INTERVAL, help="seconds between polls")
+    parser.add_argument("--adaptive", action="store_true", help="adapt the interval to pump activity")
+    parser.add_argument("--polls", type=int, help="stop after this many polls; default run forever")
+    parser.add_argument("--language", default="en")
+    parser.add_argument("--config-dir", default=".dabpumps", help="directory for the persisted stores")
+    parser.add_argument("--no-values", action="store_true", help="only emit the poll summary, not the status values")
+    parser.add_argument("--verbose", action="store_true")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.DEBUG if args.verbose else logging.WARNING, stream=sys.stderr)
+    asyncio.run(async_main(args))
+
+
+if __name__ == "__main__":
+    main()